@@ -0,0 +1,37 @@
+from typing import Optional
+
+
+class NASAAPIError(Exception):
+    """Base class of the errors raised by NASA_APIConnection queries."""
+
+    def __init__(self, message: str, endpoint: Optional[str] = None):
+        """
+        :param message: description of the error
+        :param endpoint: name of the endpoint the error comes from (e.g. 'neows')
+        """
+        super().__init__(message)
+        self.endpoint = endpoint
+
+
+class HTTPStatusError(NASAAPIError):
+    """Raised when an endpoint answers with an HTTP error status."""
+
+    def __init__(self, message: str, endpoint: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message, endpoint)
+        self.status_code = status_code
+
+
+class EndpointUnavailable(NASAAPIError):
+    """Raised when an endpoint cannot be reached, times out or keeps failing after the retries."""
+
+
+class CircuitOpenError(EndpointUnavailable):
+    """Raised without a request when an endpoint's circuit breaker is open."""
+
+    def __init__(self, message: str, endpoint: Optional[str] = None, retry_after: float = 0.0):
+        super().__init__(message, endpoint)
+        self.retry_after = retry_after
+
+
+class InvalidResponse(NASAAPIError):
+    """Raised when a response cannot be decoded or turned into a DataFrame."""
@@ -0,0 +1,128 @@
+import glob
+import json
+import os
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import pandas as pd
+
+# Fields returned by the APOD API; entries missing one (e.g. copyright) get None
+APOD_COLUMNS = ['date', 'title', 'explanation', 'url', 'hdurl', 'media_type',
+                'copyright', 'thumbnail_url', 'service_version']
+
+
+class BackfillResult(NamedTuple):
+    """Outcome of NASA_APIConnection.backfill_apod.
+
+    A backfill that stopped early sets stopped to the reason; running it again
+    later resumes with the months_left months that were not fetched.
+    """
+    written: int
+    months_left: int = 0
+    stopped: Optional[str] = None
+
+
+class APODArchive:
+    """Local archive of Astronomy Pictures Of The Day stored as Parquet files.
+
+    Entries are partitioned into one zstd-compressed file per month, so a
+    backfill can write each chunk as soon as it arrives and lookups only read
+    the columns and months they need. The date ranges fetched into the archive
+    are recorded as well, so days without an APOD are not fetched again.
+    """
+
+    def __init__(self, directory: str = '.nasa_cache/apod'):
+        """
+        :param directory: directory the monthly Parquet files are stored in
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.directory, f'apod_{month}.parquet')
+
+    def _files(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'apod_*.parquet')))
+
+    def _fetched_path(self) -> str:
+        return os.path.join(self.directory, 'fetched.json')
+
+    def _fetched(self) -> Dict[str, List[str]]:
+        try:
+            with open(self._fetched_path()) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def mark_fetched(self, start_date: str, end_date: str) -> None:
+        """Records that the APODs of a date range within one month were fetched.
+
+        :param start_date: first date in the format 'YYYY-MM-DD'
+        :param end_date: last date in the format 'YYYY-MM-DD', in the same month
+        """
+        fetched = self._fetched()
+        month = start_date[:7]
+        known = fetched.get(month)
+        # Overlapping ranges are merged, otherwise only the latest range is kept
+        if known is not None and known[0] <= end_date and start_date <= known[1]:
+            start_date, end_date = min(known[0], start_date), max(known[1], end_date)
+        fetched[month] = [start_date, end_date]
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(fetched, f)
+        os.replace(tmp_path, self._fetched_path())
+
+    def is_fetched(self, start_date: str, end_date: str) -> bool:
+        """Returns whether a date range within one month was fetched before."""
+        known = self._fetched().get(start_date[:7])
+        return known is not None and known[0] <= start_date and end_date <= known[1]
+
+    def write(self, entries: pd.DataFrame) -> int:
+        """Merges APOD entries into the archive, replacing entries with the same date.
+
+        :param entries: DataFrame as returned by NASA_APIConnection.query_apod_range
+        :returns: number of entries written
+        """
+        if entries is None or entries.empty:
+            return 0
+
+        entries = entries.reindex(columns=APOD_COLUMNS)
+        entries = entries.astype(object).where(entries.notna(), None)
+        for month, group in entries.groupby(entries['date'].str[:7]):
+            path = self._path(month)
+            if os.path.exists(path):
+                group = pd.concat([pd.read_parquet(path), group], ignore_index=True)
+            group = group.drop_duplicates(subset='date', keep='last').sort_values('date')
+
+            # Replace the file atomically so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            group.to_parquet(tmp_path, index=False, compression='zstd')
+            os.replace(tmp_path, path)
+
+        return len(entries)
+
+    def dates(self) -> Set[str]:
+        """Returns the dates present in the archive."""
+        return {d for path in self._files() for d in pd.read_parquet(path, columns=['date'])['date']}
+
+    def query(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Returns archived entries between two dates without network I/O.
+
+        :param start_date: first date in the format 'YYYY-MM-DD' (optional)
+        :param end_date: last date in the format 'YYYY-MM-DD', inclusive (optional)
+        :returns: result as a DataFrame
+        """
+        files = [path for path in self._files()
+                 if (start_date is None or os.path.basename(path)[5:12] >= start_date[:7])
+                 and (end_date is None or os.path.basename(path)[5:12] <= end_date[:7])]
+        if not files:
+            return pd.DataFrame(columns=APOD_COLUMNS)
+
+        result = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+        if start_date:
+            result = result[result['date'] >= start_date]
+        if end_date:
+            result = result[result['date'] <= end_date]
+        return result.reset_index(drop=True)
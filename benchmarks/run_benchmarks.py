@@ -0,0 +1,264 @@
+"""Offline benchmarks of NASA_APIConnection against a local stub server.
+
+Measures end-to-end query latency, parse and flatten throughput, cache-hit
+latency and scaling with concurrency, and writes the results as JSON so runs
+can be compared:
+
+    python benchmarks/run_benchmarks.py --sizes 10,100 --latencies 0,0.05 --output results.json
+
+Outside a Streamlit runtime st.cache_data does not keep results between
+calls, so every query_* call here is a cache miss. Cache hits are measured on
+the persistent tiers instead: the response cache and the exoplanet snapshots.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+import streamlit as st  # noqa: E402
+from streamlit.logger import set_log_level  # noqa: E402
+
+import json_records  # noqa: E402
+import utils  # noqa: E402
+from exoplanet_snapshot import ExoplanetSnapshot  # noqa: E402
+from request_scheduler import RequestScheduler  # noqa: E402
+from response_cache import SQLiteResponseCache  # noqa: E402
+from result_store import ArrowResultStore  # noqa: E402
+from stub_server import StubNASAServer  # noqa: E402
+
+START_DATE = date(2023, 1, 2)
+
+
+def _day(offset: int) -> str:
+    return (START_DATE + timedelta(days=offset)).isoformat()
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'mean_s': statistics.fmean(samples),
+        'p50_s': samples[len(samples) // 2],
+        'p95_s': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'min_s': samples[0],
+        'max_s': samples[-1],
+    }
+
+
+def _measure(func: Callable[[int], object], repeat: int) -> List[float]:
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _connect(server: StubNASAServer, **kwargs) -> utils.NASA_APIConnection:
+    # A limit nobody reaches keeps the rate limiter from throttling the benchmark
+    return utils.NASA_APIConnection('nasa_benchmark', api_key='BENCHMARK_KEY',
+                                    base_url=server.base_url, exoplanet_url=server.exoplanet_url,
+                                    total_retries=0, scheduler=RequestScheduler(limit=10 ** 9), **kwargs)
+
+
+def _queries(conn: utils.NASA_APIConnection, size: int) -> Dict[str, Callable[[int], pd.DataFrame]]:
+    """Returns one call per query_* method; the argument makes the parameters of each call distinct."""
+    return {
+        'query_apod': lambda i: conn.query_apod(_day(i)),
+        'query_apod_range': lambda i: conn.query_apod_range(_day(i * 90), _day(i * 90 + 89)),
+        'query_neows': lambda i: conn.query_neows(_day(i * 7), _day(i * 7 + 6)),
+        'query_neows_range': lambda i: conn.query_neows_range(_day(i * 28), _day(i * 28 + 27)),
+        'query_mars_rover_photos': lambda i: conn.query_mars_rover_photos('curiosity', 1000 + i, limit=size),
+        'query_donki': lambda i: conn.query_donki(_day(i * 30), _day(i * 30 + 29), type='CME'),
+        'query_exoplanet_data': lambda i: conn.query_exoplanet_data('cumulative', where=f'koi_period>{i}'),
+    }
+
+
+def bench_end_to_end(sizes: List[int], latencies: List[float], repeat: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        for latency in latencies:
+            with StubNASAServer(size=size, latency=latency) as server:
+                conn = _connect(server)
+                for name, query in _queries(conn, size).items():
+                    rows = len(query(repeat))  # Warm up connections and imports
+                    results.append({'benchmark': 'end_to_end', 'query': name, 'size': size, 'latency': latency,
+                                    'rows': rows, **_summarize(_measure(query, repeat))})
+    return results
+
+
+def bench_parse(sizes: List[int], repeat: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        server = StubNASAServer(size=size)
+        try:
+            neows = server.neows({'start_date': _day(0), 'end_date': _day(6)})
+            donki = server.donki({'startDate': _day(0), 'endDate': _day(365)})
+            exoplanet_csv = server._exoplanet_csv
+        finally:
+            server.stop()
+
+        neows_json = json.dumps(neows)
+        donki_json = json.dumps(donki).encode()
+        records = size * 7
+        chunk_size = utils.JSON_STREAM_CHUNK_SIZE
+        cases = {
+            'neows_json_decode': (lambda i: json.loads(neows_json), records),
+            'neows_json_decode_fast': (lambda i: json_records.loads(neows_json), records),
+            'donki_records': (lambda i: pd.DataFrame(json.loads(donki_json)), len(donki)),
+            'donki_records_fast': (lambda i: pd.DataFrame(json_records.loads(donki_json)), len(donki)),
+            # Decoding item by item as a streamed body arrives
+            'donki_records_stream': (lambda i: json_records.records_to_frame(json_records.iter_json_array(
+                donki_json[start:start + chunk_size] for start in range(0, len(donki_json), chunk_size))), len(donki)),
+            'neows_flatten_wide': (lambda i: utils._normalize_neows(neows), records),
+            'neows_flatten_long': (lambda i: utils._normalize_neows(neows, long_format=True), records),
+            'exoplanet_csv': (lambda i: utils._read_exoplanet_csv(BytesIO(exoplanet_csv)), exoplanet_csv.count(b'\n') - 1),
+        }
+        if importlib.util.find_spec('pyarrow') is not None:
+            cases['exoplanet_csv_arrow'] = (lambda i: utils._read_exoplanet_csv(BytesIO(exoplanet_csv), arrow=True), exoplanet_csv.count(b'\n') - 1)
+
+        for name, (func, count) in cases.items():
+            func(0)
+            summary = _summarize(_measure(func, repeat))
+            results.append({'benchmark': 'parse', 'query': name, 'size': size, 'records': count,
+                            'records_per_s': count / summary['mean_s'], **summary})
+    return results
+
+
+def bench_cache_hits(sizes: List[int], latencies: List[float], repeat: int) -> List[dict]:
+    results = []
+    for size in sizes:
+        for latency in latencies:
+            with StubNASAServer(size=size, latency=latency) as server, tempfile.TemporaryDirectory() as directory:
+                tiers = {
+                    # Fresh entries are served without touching the network
+                    'response_cache_fresh': _connect(server, response_cache=SQLiteResponseCache(os.path.join(directory, 'fresh.sqlite'), max_age=3600)),
+                    # Stale entries are revalidated with a conditional request answered by a 304
+                    'response_cache_revalidate': _connect(server, response_cache=SQLiteResponseCache(os.path.join(directory, 'stale.sqlite'), max_age=0)),
+                }
+                if importlib.util.find_spec('pyarrow') is not None:
+                    # Results are memory-mapped from the store instead of decoded again
+                    tiers['result_store'] = _connect(server, result_store=ArrowResultStore(os.path.join(directory, 'results')))
+                for tier, conn in tiers.items():
+                    for name, query in _queries(conn, size).items():
+                        query(0)
+                        before = server.requests
+                        summary = _summarize(_measure(lambda i: query(0), repeat))
+                        network_requests = server.requests - before
+                        # Revalidation always sends conditional requests; the other tiers must not touch the network
+                        results.append({'benchmark': 'cache_hit', 'tier': tier, 'query': name, 'size': size, 'latency': latency,
+                                        'network_requests': network_requests,
+                                        'cache_hit': tier == 'response_cache_revalidate' or network_requests == 0, **summary})
+
+                conn = _connect(server, exoplanet_snapshot=ExoplanetSnapshot(os.path.join(directory, 'exoplanet')))
+                conn.query_exoplanet_data('cumulative', select='*', snapshot=True)
+                before = server.requests
+                summary = _summarize(_measure(lambda i: conn.query_exoplanet_data('cumulative', where=f'koi_period>{i}', select='*', snapshot=True), repeat))
+                results.append({'benchmark': 'cache_hit', 'tier': 'exoplanet_snapshot', 'query': 'query_exoplanet_data', 'size': size,
+                                'latency': latency, 'network_requests': server.requests - before,
+                                'cache_hit': server.requests == before, **summary})
+    return results
+
+
+def bench_concurrency(size: int, latency: float, workers: List[int], repeat: int) -> List[dict]:
+    results = []
+    with StubNASAServer(size=size, latency=latency, separate_process=True) as server:
+        for max_workers in workers:
+            conn = _connect(server)
+            for name, query in _queries(conn, size).items():
+                calls = max_workers * repeat
+                # Distinct parameters per call, so requests are not coalesced
+                offset = max_workers * 1000
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    list(executor.map(lambda i: query(offset + i), range(calls)))
+                elapsed = time.perf_counter() - start
+                results.append({'benchmark': 'concurrency', 'query': name, 'size': size, 'latency': latency, 'workers': max_workers,
+                                'calls': calls, 'elapsed_s': elapsed, 'calls_per_s': calls / elapsed})
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(',')]
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(',')]
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=_ints, default=[10, 100], help='records per response, comma separated')
+    parser.add_argument('--latencies', type=_floats, default=[0.0, 0.05], help='simulated network latencies in seconds, comma separated')
+    parser.add_argument('--workers', type=_ints, default=[1, 2, 4, 8, 16], help='thread counts of the concurrency benchmark, comma separated')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement')
+    parser.add_argument('--only', choices=['end_to_end', 'parse', 'cache_hit', 'concurrency'], action='append',
+                        help='run only the given benchmarks')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON file the results are written to')
+    args = parser.parse_args(argv)
+
+    # Streamlit warns about the missing runtime on every cached call
+    set_log_level('error')
+
+    only = set(args.only or ['end_to_end', 'parse', 'cache_hit', 'concurrency'])
+    results = []
+    if 'end_to_end' in only:
+        results += bench_end_to_end(args.sizes, args.latencies, args.repeat)
+    if 'parse' in only:
+        results += bench_parse(args.sizes, args.repeat)
+    if 'cache_hit' in only:
+        results += bench_cache_hits(args.sizes, args.latencies, args.repeat)
+    if 'concurrency' in only:
+        results += bench_concurrency(max(args.sizes), max(args.latencies), args.workers, args.repeat)
+
+    report = {
+        'metadata': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'streamlit': st.__version__,
+            'arguments': vars(args),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    for result in results:
+        label = ' '.join(f'{key}={result[key]}' for key in ('benchmark', 'tier', 'query', 'size', 'latency', 'workers') if key in result)
+        if 'calls_per_s' in result:
+            print(f'{label}: {result["calls_per_s"]:.1f} calls/s')
+        elif not result.get('cache_hit', True):
+            # Not comparable with the other tiers, the query went to the network
+            print(f'{label}: {result["mean_s"] * 1000:.2f} ms (not a cache hit, {result["network_requests"]} network requests)')
+        else:
+            print(f'{label}: {result["mean_s"] * 1000:.2f} ms')
+    print(f'Wrote {len(results)} results to {args.output}')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+import copy
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Page size of the Mars Rover Photos API
+MARS_ROVER_PAGE_SIZE = 25
+
+
+def _load_json(name: str):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return json.load(f)
+
+
+def _date_range(start_date: str, end_date: str) -> List[str]:
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+class StubNASAServer:
+    """Local HTTP server replaying recorded NASA API payloads.
+
+    Serves the APOD, NEOWS, Mars Rover Photos and DONKI endpoints below
+    base_url and the Exoplanet Archive CSV endpoint below exoplanet_url. Every
+    recorded payload is replicated to the configured size with unique ids and
+    dates, and each response is delayed by latency seconds to stand in for the
+    network. Responses carry an ETag so conditional requests get 304s.
+
+    By default the server runs on a thread of the calling process. Concurrency
+    benchmarks should run it in a forked process instead, so building the
+    responses does not compete with the client for the GIL.
+    """
+
+    def __init__(self, size: int = 10, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0, separate_process: bool = False):
+        """
+        :param size: records per response, i.e. near earth objects per day, photos per sol,
+                     DONKI events per query and copies of the exoplanet table
+        :param latency: seconds each response is delayed by
+        :param host: interface to listen on
+        :param port: port to listen on, 0 picks a free one
+        :param separate_process: serve from a forked process instead of a thread
+        """
+        self.size = size
+        self.latency = latency
+        self.separate_process = separate_process
+        # Shared with the forked process, which does the counting
+        self._requests = multiprocessing.Value('l', 0)
+
+        self._apod = _load_json('apod.json')
+        neows = _load_json('neows.json')
+        self._neos = [neo for day in neows['near_earth_objects'].values() for neo in day]
+        self._photos = _load_json('mars_rover_photos.json')['photos']
+        self._donki = _load_json('donki_cme.json')
+        with open(os.path.join(FIXTURES_DIR, 'exoplanet_cumulative.csv'), 'rb') as f:
+            header, *rows = f.read().splitlines(keepends=True)
+        self._exoplanet_csv = header + b''.join(rows) * size
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._worker = None
+
+    @property
+    def requests(self) -> int:
+        """Returns the number of requests served so far."""
+        return self._requests.value
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def exoplanet_url(self) -> str:
+        return self.base_url + 'exoplanet?'
+
+    def start(self) -> 'StubNASAServer':
+        if self.separate_process:
+            self._worker = multiprocessing.get_context('fork').Process(target=self._server.serve_forever, daemon=True)
+        else:
+            self._worker = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        if isinstance(self._worker, threading.Thread):
+            self._server.shutdown()
+        elif self._worker is not None:
+            self._worker.terminate()
+            self._worker.join()
+        self._worker = None
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubNASAServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _apod_entry(self, day: str) -> dict:
+        entry = dict(self._apod)
+        entry['date'] = day
+        return entry
+
+    def apod(self, query: Dict[str, str]):
+        if 'start_date' in query:
+            end_date = query.get('end_date', date.today().isoformat())
+            return [self._apod_entry(day) for day in _date_range(query['start_date'], end_date)]
+        if 'count' in query:
+            first = date.fromisoformat('2000-01-01')
+            return [self._apod_entry((first + timedelta(days=i)).isoformat()) for i in range(int(query['count']))]
+        return self._apod_entry(query.get('date', self._apod['date']))
+
+    def neows(self, query: Dict[str, str]) -> dict:
+        days = {}
+        for day in _date_range(query['start_date'], query['end_date']):
+            neos = []
+            for i in range(self.size):
+                neo = copy.deepcopy(self._neos[i % len(self._neos)])
+                neo['id'] = neo['neo_reference_id'] = f'{day.replace("-", "")}{i:05d}'
+                for approach in neo['close_approach_data']:
+                    approach['close_approach_date'] = day
+                neos.append(neo)
+            days[day] = neos
+        return {'element_count': self.size * len(days), 'near_earth_objects': days}
+
+    def mars_rover_photos(self, query: Dict[str, str]) -> dict:
+        ids = range(self.size)
+        if 'page' in query:
+            page = int(query['page'])
+            ids = range((page - 1) * MARS_ROVER_PAGE_SIZE, min(page * MARS_ROVER_PAGE_SIZE, self.size))
+
+        photos = []
+        for i in ids:
+            photo = copy.deepcopy(self._photos[i % len(self._photos)])
+            photo['id'] = int(query.get('sol', 0)) * 100000 + i
+            photo['sol'] = int(query.get('sol', photo['sol']))
+            photos.append(photo)
+        return {'photos': photos}
+
+    def donki(self, query: Dict[str, str]) -> list:
+        days = _date_range(query['startDate'], query['endDate']) if 'startDate' in query else [self._donki[0]['startTime'][:10]]
+        events = []
+        for i in range(self.size):
+            event = copy.deepcopy(self._donki[i % len(self._donki)])
+            day = days[i * len(days) // self.size]
+            event['activityID'] = f'{day}T{i // 60 % 24:02d}:{i % 60:02d}:00-CME-{i:03d}'
+            event['startTime'] = f'{day}T{i // 60 % 24:02d}:{i % 60:02d}Z'
+            events.append(event)
+        return events
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections open like the real APIs do
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with server._requests.get_lock():
+                    server._requests.value += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                content_type = 'application/json'
+
+                if url.path.startswith('/planetary/apod'):
+                    body = server.apod(query)
+                elif url.path.startswith('/neo/rest/v1/feed'):
+                    body = server.neows(query)
+                elif url.path.startswith('/mars-photos/'):
+                    body = server.mars_rover_photos(query)
+                elif url.path.startswith('/DONKI/'):
+                    body = server.donki(query)
+                elif url.path.startswith('/exoplanet'):
+                    body = server._exoplanet_csv
+                    content_type = 'text/csv'
+                else:
+                    self.send_error(404)
+                    return
+
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
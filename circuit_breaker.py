@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+from api_errors import CircuitOpenError, NASAAPIError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Circuit breaker of one endpoint.
+
+    After failure_threshold consecutive failures the circuit opens and
+    requests fail straight away with CircuitOpenError. Once reset_timeout
+    seconds have passed it is half-open: a single probe request is let
+    through, and closes the circuit again if it succeeds or reopens it if
+    it fails.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        :param name: name of the endpoint, used in error messages
+        :param failure_threshold: consecutive failures that open the circuit
+        :param reset_timeout: seconds the circuit stays open before a probe is let through
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def before_request(self) -> None:
+        """Lets a request through or fails it fast.
+
+        :raises CircuitOpenError: if the circuit is open, or half-open with its probe in flight
+        """
+        with self._lock:
+            state = self._state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            retry_after = max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+            raise CircuitOpenError(f"{self.name} is failing, not sending requests for another {retry_after:.1f} seconds",
+                                   self.name, retry_after=retry_after)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Ends a request that neither succeeded nor failed, e.g. one shed by the rate limiter."""
+        with self._lock:
+            self._probing = False
+
+
+class ErrorCache:
+    """Short-lived cache of query errors, kept apart from cached results.
+
+    Repeating a query that just failed raises the same error again for ttl
+    seconds instead of going back to a failing endpoint.
+    """
+
+    def __init__(self, ttl: float = 30, max_entries: int = 1024):
+        """
+        :param ttl: seconds an error is remembered for
+        :param max_entries: number of errors kept; the oldest ones are dropped first
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._errors: 'OrderedDict[Hashable, Tuple[float, NASAAPIError]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[NASAAPIError]:
+        with self._lock:
+            entry = self._errors.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                del self._errors[key]
+                return None
+            return entry[1]
+
+    def set(self, key: Hashable, error: NASAAPIError) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._errors[key] = (time.monotonic() + self.ttl, error)
+            self._errors.move_to_end(key)
+            while len(self._errors) > self.max_entries:
+                self._errors.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._errors.clear()
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+
+from donki_store import donki_event_fields
+
+# Event types fetched by NASA_APIConnection.query_donki_all
+DONKI_ALL_TYPES = ('CME', 'GST', 'FLR', 'SEP', 'MPC', 'RBE', 'HSS', 'notifications')
+
+# Columns of the unified event table
+DONKI_EVENT_COLUMNS = ['event_type', 'event_id', 'event_time', 'link', 'linked_event_ids', 'payload']
+
+
+def normalize_donki_events(events_by_type: Dict[str, Iterable[Dict[str, Any]]]) -> pd.DataFrame:
+    """Normalizes DONKI events of several types into one table.
+
+    Every event type names its ID and time fields differently; the table has
+    them as common event_id and event_time columns, with event_time parsed
+    to UTC timestamps. The IDs in each event's linkedEvents are kept as a
+    tuple in linked_event_ids, and the event as returned by the API in payload.
+
+    :param events_by_type: DONKI events keyed by event type (e.g. {'CME': [...], 'GST': [...]})
+    :returns: one row per event, ordered by event time
+    """
+    rows = []
+    for event_type, events in events_by_type.items():
+        id_field, time_field = donki_event_fields(event_type)
+        for event in events or ():
+            if not event.get(id_field):
+                continue
+            linked = tuple(link['activityID'] for link in event.get('linkedEvents') or () if link.get('activityID'))
+            rows.append((event_type, event[id_field], event.get(time_field), event.get('link'), linked, event))
+
+    table = pd.DataFrame(rows, columns=DONKI_EVENT_COLUMNS)
+    table['event_type'] = pd.Categorical(table['event_type'], categories=list(events_by_type))
+    table['event_id'] = table['event_id'].astype(str)
+    table['event_time'] = pd.to_datetime(table['event_time'], utc=True, errors='coerce')
+    return table.sort_values('event_time', kind='mergesort', na_position='last').reset_index(drop=True)
+
+
+class DonkiLinkIndex:
+    """Index over the linkedEvents of a unified DONKI event table.
+
+    DONKI links are not always recorded on both events, so the index keeps
+    every link in both directions. Lookups are dictionary accesses instead of
+    scans over the table.
+    """
+
+    def __init__(self, events: pd.DataFrame):
+        """
+        :param events: table as returned by normalize_donki_events or NASA_APIConnection.query_donki_all
+        """
+        self.events = events
+        self._rows: Dict[str, int] = {event_id: row for row, event_id in enumerate(events['event_id'])}
+        self._links: Dict[str, Set[str]] = defaultdict(set)
+        for event_id, linked_ids in zip(events['event_id'], events['linked_event_ids']):
+            for linked_id in linked_ids:
+                self._links[event_id].add(linked_id)
+                self._links[linked_id].add(event_id)
+
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._rows
+
+    def linked_ids(self, event_id: str) -> List[str]:
+        """Returns the IDs of the events linked to an event, including ones outside the table."""
+        return sorted(self._links.get(event_id, ()))
+
+    def linked(self, event_id: str) -> pd.DataFrame:
+        """Returns the rows of the events in the table linked to an event."""
+        return self._take(self.linked_ids(event_id))
+
+    def effects(self, event_id: str) -> pd.DataFrame:
+        """Returns the linked events that happened after an event, e.g. the storms a CME caused."""
+        linked = self.linked(event_id)
+        row = self._rows.get(event_id)
+        if row is None or pd.isna(self.events['event_time'].iat[row]):
+            return linked
+        return linked[linked['event_time'] > self.events['event_time'].iat[row]].reset_index(drop=True)
+
+    def edges(self) -> List[Tuple[str, str]]:
+        """Returns every link once, as (event ID, linked event ID) pairs."""
+        return sorted({tuple(sorted((a, b))) for a, linked_ids in self._links.items() for b in linked_ids})
+
+    def _take(self, event_ids: Iterable[str]) -> pd.DataFrame:
+        rows = [self._rows[event_id] for event_id in event_ids if event_id in self._rows]
+        return self.events.iloc[sorted(rows)].reset_index(drop=True)
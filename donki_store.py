@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# ID and time fields of each DONKI event type
+DONKI_EVENT_FIELDS: Dict[str, Tuple[str, str]] = {
+    'CME': ('activityID', 'startTime'),
+    'GST': ('gstID', 'startTime'),
+    'FLR': ('flrID', 'beginTime'),
+    'SEP': ('sepID', 'eventTime'),
+    'MPC': ('mpcID', 'eventTime'),
+    'RBE': ('rbeID', 'eventTime'),
+    'HSS': ('hssID', 'eventTime'),
+    'IPS': ('activityID', 'eventTime'),
+    'notifications': ('messageID', 'messageIssueTime'),
+    'WSAEnlilSimulations': ('simulationID', 'modelCompletionTime'),
+}
+
+
+def donki_event_fields(event_type: str) -> Tuple[str, str]:
+    """Returns the (ID field, time field) pair of a DONKI event type."""
+    try:
+        return DONKI_EVENT_FIELDS[event_type]
+    except KeyError:
+        raise ValueError(f"Unsupported DONKI event type: {event_type}") from None
+
+
+class DonkiEventStore:
+    """Local SQLite store of DONKI events keyed by event type and event ID.
+
+    The store also keeps a sync watermark per event type, the end date of
+    the last successful sync, so later syncs only fetch what is new.
+    """
+
+    def __init__(self, path: str = '.nasa_cache/donki.sqlite'):
+        """
+        :param path: location of the SQLite database file
+        """
+        self.path = path
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    event_type TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    event_time TEXT,
+                    payload TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (event_type, event_id)
+                )
+            """)
+            db.execute('CREATE INDEX IF NOT EXISTS events_time ON events (event_type, event_time)')
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    event_type TEXT PRIMARY KEY,
+                    watermark TEXT NOT NULL,
+                    synced_at REAL NOT NULL
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the store safe to use from any thread
+        return sqlite3.connect(self.path, timeout=30)
+
+    def upsert(self, event_type: str, events: Iterable[Dict[str, Any]]) -> int:
+        """Inserts new events and replaces revised ones.
+
+        :param event_type: DONKI event type (e.g. 'CME')
+        :param events: events as returned by the DONKI API
+        :returns: number of events written
+        """
+        id_field, time_field = donki_event_fields(event_type)
+        now = time.time()
+        rows = [(event_type, event[id_field], event.get(time_field), json.dumps(event), now)
+                for event in events if event.get(id_field)]
+
+        with self._connect() as db:
+            db.executemany('INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def watermark(self, event_type: str) -> Optional[str]:
+        """Returns the end date of the last sync of an event type, or None if it was never synced."""
+        with self._connect() as db:
+            row = db.execute('SELECT watermark FROM sync_state WHERE event_type = ?', (event_type,)).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, event_type: str, watermark: str) -> None:
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)', (event_type, watermark, time.time()))
+
+    def events(self, event_type: str, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+        """Returns the stored events of a type, ordered by event time.
+
+        :param event_type: DONKI event type (e.g. 'CME')
+        :param start_date: first date in the format 'YYYY-MM-DD' (optional)
+        :param end_date: last date in the format 'YYYY-MM-DD', inclusive (optional)
+        :returns: events as returned by the DONKI API
+        """
+        query = 'SELECT payload FROM events WHERE event_type = ?'
+        args: List[Any] = [event_type]
+        if start_date:
+            query += ' AND substr(event_time, 1, 10) >= ?'
+            args.append(start_date)
+        if end_date:
+            query += ' AND substr(event_time, 1, 10) <= ?'
+            args.append(end_date)
+        query += ' ORDER BY event_time'
+
+        with self._connect() as db:
+            return [json.loads(payload) for (payload,) in db.execute(query, args)]
+
+    def query(self, event_type: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Same as events, but returns a DataFrame like NASA_APIConnection.query_donki."""
+        return pd.DataFrame(self.events(event_type, start_date, end_date))
@@ -0,0 +1,309 @@
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+(?:[eE][-+]?\d+)?)
+      | (?P<op><=|>=|<>|!=|=|<|>|\+|-|\*|/|\(|\)|,)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+    )""", re.VERBOSE)
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    '=': lambda a, b: a == b,
+    '<>': lambda a, b: a != b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+}
+
+_ARITHMETIC: Dict[str, Callable[[Any, Any], Any]] = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b,
+}
+
+
+def _tokenize(clause: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    clause = clause.strip()
+    while position < len(clause):
+        match = _TOKEN_RE.match(clause, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Unsupported syntax in clause at: {clause[position:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        tokens.append((kind, value.lower() if kind == 'name' else value))
+        position = match.end()
+    return tokens
+
+
+def _like_to_regex(pattern: str) -> str:
+    """Translates an SQL LIKE pattern into an anchored regular expression."""
+    return '^' + ''.join('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern) + '$'
+
+
+class _WhereParser:
+    """Recursive-descent evaluator for Exoplanet Archive 'where' clauses.
+
+    Every predicate is evaluated as a vectorized nullable boolean mask over
+    the frame. As in SQL, predicates over missing values are unknown (<NA>):
+    not, and and or follow three-valued logic, so 'not x > 1' does not match
+    rows where x is null, and only rows that are known to match are returned.
+    Supports and/or/not, comparisons, + - * /, like, in, between and is [not] null.
+    """
+
+    def __init__(self, frame: pd.DataFrame, clause: str):
+        self.frame = frame
+        self.columns = {column.lower(): column for column in frame.columns}
+        self.tokens = _tokenize(clause)
+        self.position = 0
+
+    def parse(self) -> pd.Series:
+        mask = self._or()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token in where clause: {self.tokens[self.position][1]!r}")
+        return mask.fillna(False).astype(bool)
+
+    def _peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        if self.position + offset < len(self.tokens):
+            return self.tokens[self.position + offset]
+        return None, None
+
+    def _accept(self, value: str) -> bool:
+        if self._peek()[1] == value:
+            self.position += 1
+            return True
+        return False
+
+    def _expect(self, value: str) -> None:
+        if not self._accept(value):
+            raise ValueError(f"Expected {value!r} in where clause")
+
+    def _or(self) -> pd.Series:
+        mask = self._and()
+        while self._accept('or'):
+            mask = mask | self._and()
+        return mask
+
+    def _and(self) -> pd.Series:
+        mask = self._not()
+        while self._accept('and'):
+            mask = mask & self._not()
+        return mask
+
+    def _not(self) -> pd.Series:
+        if self._accept('not'):
+            return ~self._not()
+        return self._predicate()
+
+    def _predicate(self) -> pd.Series:
+        if self._peek()[1] == '(':
+            # A parenthesized boolean expression, not arithmetic
+            self.position += 1
+            mask = self._or()
+            self._expect(')')
+            return mask
+
+        left = self._sum()
+        negate = self._accept('not')
+
+        if self._accept('like'):
+            kind, pattern = self._peek()
+            if kind != 'string':
+                raise ValueError("like expects a string pattern")
+            self.position += 1
+            values = pd.Series(left, index=self.frame.index).astype('object')
+            mask = values.str.match(_like_to_regex(pattern[1:-1].replace("''", "'")), na=False).astype(bool)
+            known = values.notna()
+        elif self._accept('in'):
+            self._expect('(')
+            options = [self._value()]
+            while self._accept(','):
+                options.append(self._value())
+            self._expect(')')
+            values = pd.Series(left, index=self.frame.index)
+            mask = values.isin([option for option in options if not pd.isna(option)])
+            # x in (..., null) is unknown rather than false when nothing else matches
+            if any(pd.isna(option) for option in options):
+                known = values.notna() & mask
+            else:
+                known = values.notna()
+        elif self._accept('between'):
+            low = self._sum()
+            self._expect('and')
+            high = self._sum()
+            mask = (left >= low) & (left <= high)
+            known = self._known(left, low, high)
+        elif self._accept('is'):
+            is_not = self._accept('not')
+            self._expect('null')
+            mask = pd.Series(left, index=self.frame.index).isna()
+            mask = ~mask if is_not else mask
+            known = True
+        else:
+            op = self._peek()[1]
+            if op not in _COMPARISONS:
+                raise ValueError(f"Expected a comparison in where clause, got {op!r}")
+            self.position += 1
+            right = self._sum()
+            mask = _COMPARISONS[op](left, right)
+            known = self._known(left, right)
+
+        mask = pd.Series(mask, index=self.frame.index).fillna(False).astype('boolean')
+        mask[~pd.Series(known, index=self.frame.index)] = pd.NA
+        return ~mask if negate else mask
+
+    def _known(self, *operands: Any) -> pd.Series:
+        mask = pd.Series(True, index=self.frame.index)
+        for operand in operands:
+            if isinstance(operand, pd.Series):
+                mask &= operand.notna()
+            elif pd.isna(operand):
+                mask &= False
+        return mask
+
+    def _sum(self) -> Any:
+        value = self._product()
+        while self._peek()[1] in ('+', '-'):
+            op = self.tokens[self.position][1]
+            self.position += 1
+            value = _ARITHMETIC[op](value, self._product())
+        return value
+
+    def _product(self) -> Any:
+        value = self._operand()
+        while self._peek()[1] in ('*', '/'):
+            op = self.tokens[self.position][1]
+            self.position += 1
+            value = _ARITHMETIC[op](value, self._operand())
+        return value
+
+    def _operand(self) -> Any:
+        kind, token = self._peek()
+        if kind == 'name' and token in self.columns:
+            self.position += 1
+            return self.frame[self.columns[token]]
+        if token == '-':
+            self.position += 1
+            return -self._operand()
+        return self._value()
+
+    def _value(self) -> Any:
+        kind, token = self._peek()
+        self.position += 1
+        if kind == 'string':
+            return token[1:-1].replace("''", "'")
+        if kind == 'number':
+            return float(token) if any(c in token for c in '.eE') else int(token)
+        if kind == 'name' and token == 'null':
+            return np.nan
+        raise ValueError(f"Unknown column or value in where clause: {token!r}")
+
+
+def query_frame(frame: pd.DataFrame, where: str = None, select: str = None, order: str = None) -> pd.DataFrame:
+    """Applies Exoplanet Archive style select/where/order clauses to a DataFrame.
+
+    :param frame: table to query
+    :param where: 'where' clause to specify filtering conditions (optional)
+    :param select: comma separated columns to return, or '*' (optional)
+    :param order: comma separated columns to order by, each optionally followed by asc/desc (optional)
+    :returns: result as a DataFrame
+    :raises ValueError: if a clause uses syntax the local evaluator does not support
+    """
+    columns = {column.lower(): column for column in frame.columns}
+
+    def _column(name: str) -> str:
+        try:
+            return columns[name.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Unknown column: {name.strip()!r}") from None
+
+    result = frame
+    if where and where.strip():
+        result = result[_WhereParser(result, where).parse()]
+
+    if order and order.strip():
+        by, ascending = [], []
+        for term in order.split(','):
+            parts = term.split()
+            by.append(_column(parts[0]))
+            ascending.append(len(parts) < 2 or parts[1].lower() != 'desc')
+        result = result.sort_values(by, ascending=ascending, kind='mergesort', na_position='last')
+
+    if select and select.strip() != '*':
+        result = result[[_column(name) for name in select.split(',')]]
+
+    return result.reset_index(drop=True)
+
+
+class ExoplanetSnapshot:
+    """Local Parquet snapshots of Exoplanet Archive tables.
+
+    A table is downloaded once and refreshed when its snapshot is older than
+    max_age. Loaded snapshots are kept in memory, so repeated queries over the
+    same table only pay for the local evaluation.
+    """
+
+    def __init__(self, directory: str = '.nasa_cache/exoplanet', max_age: float = 24 * 3600):
+        """
+        :param directory: directory the snapshots are stored in
+        :param max_age: seconds after which a snapshot is downloaded again
+        """
+        self.directory = directory
+        self.max_age = max_age
+        self._frames: Dict[str, Tuple[float, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, table: str) -> str:
+        # Table names end up in a file name, so they must not contain path separators or dots
+        if not re.fullmatch(r'[A-Za-z0-9_]+', table):
+            raise ValueError(f"Invalid Exoplanet Archive table name: {table!r}")
+        return os.path.join(self.directory, f'{table}.parquet')
+
+    def is_fresh(self, table: str) -> bool:
+        path = self._path(table)
+        return os.path.exists(path) and time.time() - os.path.getmtime(path) < self.max_age
+
+    def load(self, table: str, download: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """Returns a table snapshot, downloading it with download(table) when missing or stale.
+
+        :param table: name of the data table (e.g., 'cumulative')
+        :param download: function returning the full table as a DataFrame
+        :returns: the table as a DataFrame
+        """
+        # One lock for all tables keeps concurrent sessions from downloading the same table twice
+        with self._lock:
+            path = self._path(table)
+            if not self.is_fresh(table):
+                self.save(table, download(table))
+
+            mtime = os.path.getmtime(path)
+            cached = self._frames.get(table)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, pd.read_parquet(path))
+                self._frames[table] = cached
+            return cached[1]
+
+    def save(self, table: str, frame: pd.DataFrame) -> None:
+        # Replace the file atomically so other processes never read a partial snapshot
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        frame.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, self._path(table))
+
+    def query(self, table: str, download: Callable[[str], pd.DataFrame], where: str = None, select: str = None, order: str = None) -> pd.DataFrame:
+        """Runs select/where/order clauses against the local snapshot of a table."""
+        return query_frame(self.load(table, download), where=where, select=select, order=order)
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Iterable, List, Optional, Tuple
+
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails fall back to the original image
+    Image = None
+
+from lru_index import SQLiteLRUIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache:
+    """Content-addressed on-disk cache of remote images and their thumbnails.
+
+    Originals are stored under the SHA-256 of their content, so the same image
+    served from several URLs is stored once. An SQLite index maps URLs to
+    digests and tracks file access times; once the cached files exceed
+    max_bytes, the least recently used ones are evicted.
+    """
+
+    def __init__(self, directory: str = '.nasa_cache/images', max_bytes: int = 1024 * 1024 * 1024, thumbnail_size: Tuple[int, int] = (300, 300)):
+        """
+        :param directory: directory the images and the index are stored in
+        :param max_bytes: maximum total size of cached originals and thumbnails
+        :param thumbnail_size: bounding box thumbnails are downscaled to
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.thumbnail_size = thumbnail_size
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'thumbnails'), exist_ok=True)
+
+        self._index = SQLiteLRUIndex(os.path.join(directory, 'index.sqlite'), 'files', """
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            accessed_at REAL NOT NULL
+        """)
+        with self._index.connect() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL)')
+
+    def _original_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def _thumbnail_path(self, digest: str) -> str:
+        width, height = self.thumbnail_size
+        return os.path.join(self.directory, 'thumbnails', digest[:2], f'{digest}_{width}x{height}.jpg')
+
+    def get(self, url: str, thumbnail: bool = False) -> Optional[str]:
+        """Returns the local path of a cached image, or None if it is not cached.
+
+        :param url: remote image URL
+        :param thumbnail: return the downscaled thumbnail instead of the original
+        :returns: path of the cached file
+        """
+        with self._index.connect() as db:
+            row = db.execute('SELECT digest FROM urls WHERE url = ?', (url,)).fetchone()
+            if row is None:
+                return None
+
+            path = self._thumbnail_path(row[0]) if thumbnail else self._original_path(row[0])
+            if self._index.touch(db, path) and os.path.exists(path):
+                return path
+
+        # The file was evicted; a thumbnail can still be rebuilt from its original
+        if thumbnail:
+            original = self.get(url)
+            if original is not None:
+                return self._make_thumbnail(row[0], original)
+        return None
+
+    def fetch(self, session: requests.Session, url: str, thumbnail: bool = False) -> Optional[str]:
+        """Returns the local path of an image, downloading it first if it is not cached.
+
+        :param session: session used to download the image
+        :param url: remote image URL
+        :param thumbnail: return the downscaled thumbnail instead of the original
+        :returns: path of the cached file, or None if the URL does not point to an image
+        """
+        path = self.get(url, thumbnail=thumbnail)
+        if path is not None:
+            return path
+
+        response = session.get(url)
+        response.raise_for_status()
+        if not response.headers.get('Content-Type', 'image/').startswith('image/'):
+            return None
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        original = self._original_path(digest)
+        if not os.path.exists(original):
+            self._write(original, content)
+
+        with self._index.connect() as db:
+            db.execute('INSERT OR REPLACE INTO urls VALUES (?, ?)', (url, digest))
+            db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', (original, len(content), time.time()))
+
+        path = self._make_thumbnail(digest, original) if thumbnail else original
+        self._evict(keep=path)
+        return path
+
+    def prefetch(self, session: requests.Session, urls: Iterable[str], thumbnail: bool = False, max_workers: int = 8) -> List[Optional[str]]:
+        """Downloads many images concurrently and returns their local paths in order.
+
+        Images that fail to download are returned as None.
+
+        :param session: session used to download the images
+        :param urls: remote image URLs
+        :param thumbnail: return downscaled thumbnails instead of the originals
+        :param max_workers: number of images downloaded at the same time
+        :returns: list of local paths
+        """
+
+        def _fetch(url: str) -> Optional[str]:
+            try:
+                return self.fetch(session, url, thumbnail=thumbnail)
+            except Exception as e:
+                logger.warning("Failed to download image %s: %s", url, e)
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_fetch, urls))
+
+    def size(self) -> int:
+        """Returns the total size of the cached files in bytes."""
+        return self._index.size()
+
+    def _make_thumbnail(self, digest: str, original: str) -> str:
+        if Image is None:
+            return original
+
+        path = self._thumbnail_path(digest)
+        if not os.path.exists(path):
+            try:
+                with Image.open(original) as image:
+                    image = image.convert('RGB')
+                    image.thumbnail(self.thumbnail_size)
+                    buffer = BytesIO()
+                    image.save(buffer, format='JPEG', quality=85)
+            except OSError:
+                # Not an image Pillow can decode, serve the original instead
+                return original
+            self._write(path, buffer.getvalue())
+
+        with self._index.connect() as db:
+            db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?)', (path, os.path.getsize(path), time.time()))
+        return path
+
+    def _write(self, path: str, content: bytes) -> None:
+        # Write to a temporary file first so readers never see a partial image
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _evict(self, keep: str = None) -> None:
+        with self._index.connect() as db:
+            evicted = self._index.evict(db, self.max_bytes, keep=keep)
+        for path in evicted:
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,109 @@
+import codecs
+import json
+from typing import Any, Dict, Generator, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # Bodies are decoded with the json module
+    orjson = None
+
+_decoder = json.JSONDecoder()
+_whitespace = json.decoder.WHITESPACE.match
+
+# States of iter_json_array
+_OPEN, _FIRST_ITEM, _ITEM, _SEPARATOR, _CLOSED = range(5)
+
+
+def loads(content: bytes) -> Any:
+    """Decodes a JSON document, with orjson if it is installed.
+
+    orjson is stricter than the json module (no NaN, integers of at most 64
+    bits); documents it rejects are decoded with the json module instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(content)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Generator[Any, None, None]:
+    """Incrementally decodes a JSON array, yielding its items as the chunks of the body arrive.
+
+    Only the item being decoded is buffered, so items can be consumed while
+    the rest of the body is still downloading. An empty body is an empty array.
+
+    :param chunks: the body in chunks of any size, e.g. response.iter_content(65536)
+    :returns: generator of the decoded items
+    :raises ValueError: if the body is not a JSON array
+    """
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    # What the parser expects next: '[', an item or ']', an item, ',' or ']', or nothing at all
+    state = _OPEN
+
+    for chunk in chunks:
+        buffer = buffer[pos:] + text.decode(chunk)
+        pos = _whitespace(buffer).end()
+
+        while pos < len(buffer):
+            char = buffer[pos]
+            if state == _OPEN:
+                if char != '[':
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos:pos + 20]!r}")
+                state = _FIRST_ITEM
+            elif state == _CLOSED:
+                raise ValueError(f"Unexpected data after the JSON array: {buffer[pos:pos + 20]!r}")
+            elif char == ']' and state in (_FIRST_ITEM, _SEPARATOR):
+                state = _CLOSED
+            elif char == ',' and state == _SEPARATOR:
+                state = _ITEM
+            elif state == _SEPARATOR:
+                raise ValueError(f"Expected ',' or ']' in the JSON array, got {buffer[pos:pos + 20]!r}")
+            else:
+                try:
+                    item, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # The item continues in the next chunk
+                    break
+                # A number may continue in the next chunk too, so the item only
+                # counts as decoded once the separator after it has arrived
+                after = _whitespace(buffer, end).end()
+                if after == len(buffer) or buffer[after] not in ',]':
+                    break
+                yield item
+                pos = after
+                state = _SEPARATOR
+                continue
+            pos = _whitespace(buffer, pos + 1).end()
+
+    if state not in (_OPEN, _CLOSED):
+        raise ValueError("Malformed JSON array, or the body ended before its closing bracket")
+
+
+def records_to_frame(records: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """Builds a DataFrame from records one column at a time, as they are consumed.
+
+    The result equals pd.DataFrame(list(records)): columns are ordered by
+    first appearance and fields missing from a record are NaN. The list of
+    records is never materialized, so this pairs with iter_json_array.
+    """
+    columns: Dict[str, List[Any]] = {}
+    rows = 0
+    for record in records:
+        for name, value in record.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [np.nan] * rows
+            column.append(value)
+        rows += 1
+        if len(record) != len(columns):
+            for column in columns.values():
+                if len(column) < rows:
+                    column.append(np.nan)
+    return pd.DataFrame(columns)
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+
+class SQLiteLRUIndex:
+    """SQLite table indexing the entries of an on-disk cache, evicting the least recently used.
+
+    The table is keyed by its first column and must have size and accessed_at
+    columns; owners add whatever other columns they need. The database runs
+    in WAL mode so several app processes on one host can share it, and every
+    operation opens its own connection so the index is safe to use from any
+    thread.
+    """
+
+    def __init__(self, path: str, table: str, columns: str):
+        """
+        :param path: location of the SQLite database file
+        :param table: name of the table
+        :param columns: column definitions of the table, the first being its TEXT PRIMARY KEY
+        """
+        self.path = path
+        self.table = table
+        self.key = columns.split()[0]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns})')
+            db.execute(f'CREATE INDEX IF NOT EXISTS {table}_accessed_at ON {table} (accessed_at)')
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def touch(self, db: sqlite3.Connection, key: str) -> bool:
+        """Marks an entry as used now and returns whether it exists."""
+        return db.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE {self.key} = ?', (time.time(), key)).rowcount > 0
+
+    def size(self) -> int:
+        """Returns the total size of the indexed entries in bytes."""
+        with self.connect() as db:
+            return db.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+
+    def evict(self, db: sqlite3.Connection, max_bytes: int, keep: Optional[str] = None) -> List[str]:
+        """Deletes the least recently used entries until the rest fit in max_bytes.
+
+        :param db: connection the entries are deleted on
+        :param max_bytes: maximum total size of the entries that are kept
+        :param keep: key of an entry that is never evicted, e.g. the one just stored
+        :returns: keys of the evicted entries, whose files the caller removes
+        """
+        total = db.execute(f'SELECT COALESCE(SUM(size), 0) FROM {self.table}').fetchone()[0]
+        if total <= max_bytes:
+            return []
+
+        evicted = []
+        for key, size in db.execute(f'SELECT {self.key}, size FROM {self.table} ORDER BY accessed_at').fetchall():
+            if key == keep:
+                continue
+            db.execute(f'DELETE FROM {self.table} WHERE {self.key} = ?', (key,))
+            evicted.append(key)
+            total -= size
+            if total <= max_bytes:
+                break
+        return evicted
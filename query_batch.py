@@ -0,0 +1,34 @@
+from typing import Any, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+
+class QuerySpec(NamedTuple):
+    """A call of one of the query_* methods of NASA_APIConnection, as passed to query_many.
+
+    Specs are hashable, so identical queries in a batch are run once.
+    Arguments must be hashable too (e.g. tuples instead of lists).
+    """
+    method: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Tuple[Tuple[str, Any], ...] = ()
+
+    @classmethod
+    def of(cls, method: str, *args: Any, **kwargs: Any) -> 'QuerySpec':
+        """Builds a spec from a call, e.g. QuerySpec.of('query_mars_rover_photos', 'Curiosity', 1000, limit=25)."""
+        return cls(method, args, tuple(sorted(kwargs.items())))
+
+    def __str__(self) -> str:
+        arguments = [repr(arg) for arg in self.args] + [f'{key}={value!r}' for key, value in self.kwargs]
+        return f"{self.method}({', '.join(arguments)})"
+
+
+class QueryResult(NamedTuple):
+    """Outcome of a QuerySpec run by query_many: its result, or the error it failed with.
+
+    The error is usually a NASAAPIError, but queries of local data (e.g.
+    query_apod_archive) fail with other exceptions such as ValueError.
+    """
+    spec: QuerySpec
+    data: Optional[pd.DataFrame]
+    error: Optional[Exception]
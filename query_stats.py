@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Generator, List, Sequence
+
+import pandas as pd
+
+# Upper bounds in seconds of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Phases a query's time is split into
+PHASES = ('network', 'decode', 'build')
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count >= q * self.count:
+                return bound
+        return float('inf')
+
+
+class _EndpointStats:
+    def __init__(self, buckets: Sequence[float]):
+        self.latency = {phase: Histogram(buckets) for phase in PHASES}
+        self.bytes = 0
+        self.requests = 0
+        self.retries = 0
+        self.calls = 0
+        self.cache_misses = 0
+        self.errors = 0
+
+
+class QueryStats:
+    """Thread-safe per-endpoint instrumentation of NASA_APIConnection.
+
+    Records latency histograms for the network, decode and DataFrame build
+    phases of each query. Also records bytes transferred, retries done by the
+    Retry adapter, cache hits and misses, and errors.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        :param buckets: upper bounds in seconds of the latency histogram buckets
+        """
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointStats] = defaultdict(lambda: _EndpointStats(self.buckets))
+
+    def observe(self, endpoint: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            self._endpoints[endpoint].latency[phase].observe(seconds)
+
+    @contextmanager
+    def timer(self, endpoint: str, phase: str) -> Generator[None, None, None]:
+        """Times the enclosed block as one observation of an endpoint's phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(endpoint, phase, time.perf_counter() - start)
+
+    def record_request(self, endpoint: str, num_bytes: int = 0, retries: int = 0) -> None:
+        """Records a request that went to the network."""
+        with self._lock:
+            stats = self._endpoints[endpoint]
+            stats.requests += 1
+            stats.bytes += num_bytes
+            stats.retries += retries
+
+    def record_call(self, endpoint: str, count: int = 1) -> None:
+        """Records calls of a cached query, whether or not they hit the cache."""
+        with self._lock:
+            self._endpoints[endpoint].calls += count
+
+    def record_cache_miss(self, endpoint: str) -> None:
+        """Records a cached query whose result had to be computed."""
+        with self._lock:
+            self._endpoints[endpoint].cache_misses += 1
+
+    def record_error(self, endpoint: str) -> None:
+        with self._lock:
+            self._endpoints[endpoint].errors += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Returns the recorded statistics per endpoint as plain dicts."""
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                result[endpoint] = {
+                    'requests': stats.requests,
+                    'bytes': stats.bytes,
+                    'retries': stats.retries,
+                    'cache_hits': max(stats.calls - stats.cache_misses, 0),
+                    'cache_misses': stats.cache_misses,
+                    'errors': stats.errors,
+                    'latency': {
+                        phase: {
+                            'count': histogram.count,
+                            'sum': histogram.sum,
+                            'p50': histogram.quantile(0.5),
+                            'p95': histogram.quantile(0.95),
+                            'buckets': dict(zip(histogram.buckets, histogram.counts)),
+                        }
+                        for phase, histogram in stats.latency.items()
+                    },
+                }
+            return result
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Returns a one-row-per-endpoint summary of the recorded statistics."""
+        rows = []
+        for endpoint, stats in self.snapshot().items():
+            row = {key: stats[key] for key in ('requests', 'bytes', 'retries', 'cache_hits', 'cache_misses', 'errors')}
+            for phase, latency in stats['latency'].items():
+                row[f'{phase}_mean_s'] = latency['sum'] / latency['count'] if latency['count'] else None
+                row[f'{phase}_p95_s'] = latency['p95'] if latency['count'] else None
+            rows.append(pd.Series(row, name=endpoint))
+        return pd.DataFrame(rows)
+
+    def to_prometheus(self, prefix: str = 'nasa_api') -> str:
+        """Renders the recorded statistics in the Prometheus text exposition format."""
+        lines: List[str] = [
+            f'# HELP {prefix}_latency_seconds Time spent per query phase.',
+            f'# TYPE {prefix}_latency_seconds histogram',
+        ]
+        snapshot = self.snapshot()
+        for endpoint, stats in snapshot.items():
+            for phase, latency in stats['latency'].items():
+                labels = f'endpoint="{endpoint}",phase="{phase}"'
+                for bound, count in latency['buckets'].items():
+                    lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{prefix}_latency_seconds_bucket{{{labels},le="+Inf"}} {latency["count"]}')
+                lines.append(f'{prefix}_latency_seconds_sum{{{labels}}} {latency["sum"]}')
+                lines.append(f'{prefix}_latency_seconds_count{{{labels}}} {latency["count"]}')
+
+        counters = [
+            ('requests', 'Requests sent to the network.'),
+            ('bytes', 'Response bytes transferred.'),
+            ('retries', 'Retries done by the Retry adapter.'),
+            ('cache_hits', 'Cached query calls served from the cache.'),
+            ('cache_misses', 'Cached query calls that had to be computed.'),
+            ('errors', 'Queries that failed.'),
+        ]
+        for name, description in counters:
+            lines.append(f'# HELP {prefix}_{name}_total {description}')
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for endpoint, stats in snapshot.items():
+                lines.append(f'{prefix}_{name}_total{{endpoint="{endpoint}"}} {stats[name]}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from api_errors import NASAAPIError
+
+# Request priorities, lower values are served first when the quota runs low
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> Optional[float]:
+    """Returns a numeric header, or None if it is missing or malformed."""
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimitExceeded(NASAAPIError):
+    """Raised when a request is shed because the API key's rate limit quota is too low."""
+
+
+class RequestScheduler:
+    """Rate-limit-aware scheduler for NASA API requests.
+
+    The scheduler keeps a token bucket in sync with the X-RateLimit-Limit and
+    X-RateLimit-Remaining headers that api.nasa.gov returns. Low priority
+    requests are shed once the bucket falls to the reserve, and other requests
+    wait for tokens for up to max_wait seconds.
+
+    Identical requests issued while one is already in flight are coalesced:
+    only the first goes to the network and every caller gets its result.
+    """
+
+    def __init__(self, limit: int = 1000, period: float = 3600, reserve: int = 50, max_wait: float = 30):
+        """
+        :param limit: requests allowed per period, updated from X-RateLimit-Limit
+        :param period: length of the rate limit window in seconds
+        :param reserve: tokens kept back for normal and high priority requests, at most a tenth of the limit
+        :param max_wait: seconds a request waits for a token before giving up
+        """
+        self.limit = limit
+        self.period = period
+        self.reserve = reserve
+        self.max_wait = max_wait
+
+        self._tokens = float(limit)
+        self._updated_at = time.monotonic()
+        self._condition = threading.Condition()
+        self._in_flight: Dict[str, Future] = {}
+
+    @property
+    def remaining(self) -> float:
+        """Returns the number of requests the bucket currently allows."""
+        with self._condition:
+            self._refill()
+            return self._tokens
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.limit, self._tokens + (now - self._updated_at) * self.limit / self.period)
+        self._updated_at = now
+
+    def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """Takes a token from the bucket, waiting for one if needed.
+
+        :param priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :raises RateLimitExceeded: if the request is shed or no token frees up within max_wait
+        """
+        deadline = time.monotonic() + self.max_wait
+
+        with self._condition:
+            while True:
+                self._refill()
+                # High priority requests may use the reserve, the others leave it alone.
+                # Small limits (e.g. DEMO_KEY's) get a smaller reserve, so the bucket can still reach the floor
+                floor = 1 if priority == PRIORITY_HIGH else min(self.reserve, self.limit // 10) + 1
+                floor = min(floor, max(self.limit, 1))
+                if self._tokens >= floor:
+                    self._tokens -= 1
+                    return
+
+                if priority == PRIORITY_LOW:
+                    raise RateLimitExceeded(f"Shedding low priority request, {int(self._tokens)} requests left in the rate limit")
+
+                timeout = min(deadline - time.monotonic(), (floor - self._tokens) * self.period / self.limit)
+                if timeout <= 0:
+                    raise RateLimitExceeded(f"No rate limit quota freed up within {self.max_wait} seconds")
+                self._condition.wait(timeout)
+
+    def update(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Synchronizes the bucket with the rate limit headers of a response."""
+        with self._condition:
+            limit = _header_number(headers, 'X-RateLimit-Limit')
+            if limit is not None and limit > 0:
+                self.limit = int(limit)
+
+            remaining = _header_number(headers, 'X-RateLimit-Remaining')
+            if status_code == 429:
+                self._tokens = 0
+            elif remaining is not None:
+                # The API's count also includes requests made by other processes
+                self._refill()
+                self._tokens = remaining
+            self._updated_at = time.monotonic()
+            self._condition.notify_all()
+
+    def run(self, key: Optional[str], func: Callable[[], Any]) -> Any:
+        """Runs a request, sharing its result with identical requests issued while it is in flight.
+
+        :param key: identifies the request for coalescing, or None to never coalesce it
+        :param func: function making the request, e.g. through send
+        :returns: the result of func, possibly shared with concurrent callers
+        """
+        if key is None:
+            return func()
+
+        with self._condition:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._condition:
+                del self._in_flight[key]
+
+        return future.result()
+
+    def send(self, func: Callable[[], Any], priority: int = PRIORITY_NORMAL, rate_limited: bool = True) -> Any:
+        """Sends a request over the network, taking a token for it first.
+
+        Only call this for requests that reach the network: the bucket is
+        synchronized with the rate limit headers of the response.
+
+        :param func: function sending the request and returning its requests.Response
+        :param priority: PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW
+        :param rate_limited: whether the request counts against the rate limit
+        :returns: the response
+        """
+        if rate_limited:
+            self.acquire(priority)
+
+        response = func()
+        if rate_limited:
+            self.update(response.status_code, response.headers)
+        return response
@@ -0,0 +1,206 @@
+import abc
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from lru_index import SQLiteLRUIndex
+
+# Parameters that must never become part of a cache key
+UNCACHED_PARAMS = ('api_key',)
+
+# Headers of a 304 that describe its own (empty) body rather than the stored one
+BODY_HEADERS = ('Content-Length', 'Content-Encoding', 'Transfer-Encoding')
+
+
+def make_cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Builds a cache key from an endpoint URL and its normalized parameters.
+
+    Parameters are sorted, None values are dropped (requests does not send them)
+    and the API key is left out so keys can be shared between API keys.
+
+    :param url: endpoint URL
+    :param params: query parameters
+    :returns: hex digest identifying the request
+    """
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items()
+                   if v is not None and k not in UNCACHED_PARAMS)
+    return hashlib.sha256(f"{url}?{urlencode(items)}".encode()).hexdigest()
+
+
+def strip_uncached_params(url: str) -> str:
+    """Removes the parameters that must never be stored (e.g. the API key) from a URL's query string."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in UNCACHED_PARAMS]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class CachedResponse(NamedTuple):
+    """A response body stored in a ResponseCache together with its validators"""
+    url: str
+    content: bytes
+    headers: Dict[str, str]
+    stored_at: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get('ETag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get('Last-Modified')
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Returns the headers that turn a request into a conditional request."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Rebuilds a requests.Response from the stored body and headers."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = self.content
+        return response
+
+
+class ResponseCache(abc.ABC):
+    """Base class for persistent HTTP response caches used by NASA_APIConnection.
+
+    Subclasses store CachedResponse objects under keys built by make_cache_key.
+    """
+
+    def __init__(self, max_age: float = 0):
+        """
+        :param max_age: seconds an entry is served without revalidating it upstream
+        """
+        self.max_age = max_age
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Returns the entry stored under key, or None."""
+
+    @abc.abstractmethod
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Stores an entry under key, replacing any previous one."""
+
+    @abc.abstractmethod
+    def touch(self, key: str, headers: Dict[str, str]) -> None:
+        """Marks an entry as revalidated, e.g. after a 304 Not Modified.
+
+        :param key: key of the entry
+        :param headers: the entry's headers, updated with those of the 304
+        """
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        return time.time() - cached.stored_at < self.max_age
+
+    def fetch(self, send: Callable[..., requests.Response], url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> requests.Response:
+        """Issues a GET through the cache.
+
+        Fresh entries are served without network I/O. Stale entries are
+        revalidated with If-None-Match/If-Modified-Since, so unchanged data
+        costs a 304 instead of a full payload. Streamed requests (stream=True)
+        bypass the cache, since their body is consumed by the caller.
+
+        :param send: function sending a GET over the network, e.g. session.get; not called for fresh entries
+        :param url: endpoint URL
+        :param params: query parameters
+        :param kwargs: other arguments passed to send
+        :returns: the upstream or cached response
+        """
+        if kwargs.get('stream'):
+            return send(url, params=params, **kwargs)
+
+        key = make_cache_key(url, params)
+        cached = self.get(key)
+        headers = dict(kwargs.pop('headers', None) or {})
+
+        if cached is not None:
+            if self.is_fresh(cached):
+                return cached.to_response()
+            headers.update(cached.conditional_headers())
+
+        response = send(url, params=params, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached is not None:
+            # The 304 carries the current validators and caching headers of the stored body
+            headers = dict(cached.headers)
+            headers.update((name, value) for name, value in response.headers.items() if name.title() not in BODY_HEADERS)
+            self.touch(key, headers)
+            return cached._replace(headers=headers).to_response()
+
+        if response.status_code == 200:
+            self.set(key, CachedResponse(url=strip_uncached_params(response.url), content=response.content,
+                                         headers=dict(response.headers), stored_at=time.time()))
+        return response
+
+
+class SQLiteResponseCache(ResponseCache):
+    """ResponseCache stored in a local SQLite database.
+
+    The database runs in WAL mode so several app processes on one host can
+    share it. Once the stored bodies exceed max_bytes, the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, path: str = '.nasa_cache/responses.sqlite', max_bytes: int = 512 * 1024 * 1024, max_age: float = 0):
+        """
+        :param path: location of the SQLite database file
+        :param max_bytes: maximum total size of stored response bodies
+        :param max_age: seconds an entry is served without revalidating it upstream
+        """
+        super().__init__(max_age=max_age)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._index = SQLiteLRUIndex(path, 'responses', """
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            content BLOB NOT NULL,
+            headers TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        """)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._index.connect() as db:
+            row = db.execute('SELECT url, content, headers, stored_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._index.touch(db, key)
+
+        url, content, headers, stored_at = row
+        return CachedResponse(url=url, content=content, headers=json.loads(headers), stored_at=stored_at)
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        with self._index.connect() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (key, response.url, response.content, json.dumps(response.headers),
+                        len(response.content), response.stored_at, time.time()))
+            self._index.evict(db, self.max_bytes)
+
+    def touch(self, key: str, headers: Dict[str, str]) -> None:
+        now = time.time()
+        with self._index.connect() as db:
+            db.execute('UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE key = ?',
+                       (json.dumps(headers), now, now, key))
+
+    def clear(self) -> None:
+        with self._index.connect() as db:
+            db.execute('DELETE FROM responses')
+
+    def size(self) -> int:
+        """Returns the total size of the stored response bodies in bytes."""
+        return self._index.size()
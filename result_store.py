@@ -0,0 +1,142 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # ArrowResultStore is unavailable
+    pa = None
+
+from lru_index import SQLiteLRUIndex
+
+# Values Arrow turns into structs and lists, which do not survive the round trip
+# unchanged: missing keys come back as None and integers mixed with floats as floats
+_NESTED_TYPES = (dict, list, tuple)
+
+
+def _has_nested_values(frame: pd.DataFrame) -> bool:
+    for column, dtype in frame.dtypes.items():
+        if dtype == object and any(isinstance(value, _NESTED_TYPES) for value in frame[column]):
+            return True
+    return False
+
+
+class ArrowResultStore:
+    """Store of query results shared by every session and process as memory-mapped Arrow files.
+
+    cache_data pickles a result when it stores it and unpickles a new copy on
+    every access, so every rerun of every session holds a copy of its own.
+    Results in this store are written once as uncompressed Arrow IPC files.
+    Readers memory-map them and get DataFrames with Arrow-backed columns
+    (pd.ArrowDtype) that point into the mapping instead of copying it. The
+    operating system shares the mapped pages between all readers, and Arrow
+    buffers are immutable, so no reader can change what the others see.
+
+    An SQLite index tracks the files and their access times; once they exceed
+    max_bytes, the least recently used are evicted. Readers still holding a
+    view of an evicted result keep their mapping until they drop it.
+    """
+
+    def __init__(self, directory: str = '.nasa_cache/results', max_bytes: int = 1024 * 1024 * 1024):
+        """
+        :param directory: directory the result files and the index are stored in
+        :param max_bytes: maximum total size of the stored results
+        """
+        if pa is None:
+            raise ImportError("ArrowResultStore requires pyarrow")
+        if not hasattr(pd, 'ArrowDtype'):
+            raise ImportError(f"ArrowResultStore requires pandas 1.5 or later, found {pd.__version__}")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+        self._index = SQLiteLRUIndex(os.path.join(directory, 'index.sqlite'), 'results', """
+            key TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        """)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, 'objects', digest[:2], f'{digest}.arrow')
+
+    def get(self, key: str, ttl: float) -> Optional[pd.DataFrame]:
+        """Returns a read-only view of a stored result, or None if it is missing or older than ttl.
+
+        :param key: identifies the result
+        :param ttl: seconds a result is valid for
+        :returns: result with Arrow-backed columns, mapped from the store
+        """
+        with self._index.connect() as db:
+            row = db.execute('SELECT path, stored_at FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None or time.time() - row[1] >= ttl:
+                return None
+            self._index.touch(db, key)
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(row[0], 'r')).read_all()
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            return None
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    def put(self, key: str, frame: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Stores a result and returns a read-only view of the stored copy.
+
+        :param key: identifies the result
+        :param frame: result to store
+        :returns: the stored result as get returns it, or None if its columns
+                  hold values Arrow cannot represent (e.g. mixed types) or
+                  nested values (dicts, lists, tuples) it would not return unchanged
+        """
+        if _has_nested_values(frame):
+            return None
+        try:
+            table = pa.Table.from_pandas(frame)
+        except pa.ArrowException:
+            return None
+
+        path = self._path(key)
+        # Write to a temporary file first so readers never map a partial result
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f, pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._index.connect() as db:
+            db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)', (key, path, os.path.getsize(path), now, now))
+
+        self._evict(keep=key)
+        return self.get(key, ttl=float('inf'))
+
+    def size(self) -> int:
+        """Returns the total size of the stored results in bytes."""
+        return self._index.size()
+
+    def clear(self) -> None:
+        """Removes every stored result."""
+        with self._index.connect() as db:
+            paths = [path for (path,) in db.execute('SELECT path FROM results')]
+            db.execute('DELETE FROM results')
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _evict(self, keep: str = None) -> None:
+        with self._index.connect() as db:
+            evicted = self._index.evict(db, self.max_bytes, keep=keep)
+        for key in evicted:
+            path = self._path(key)
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,81 @@
+import socket
+from typing import Any, Dict, List
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class _CountingPoolMixin:
+    """Counts connections a pool had to discard because it was full."""
+
+    discarded = 0
+
+    def _put_conn(self, conn):
+        # Racy without the queue's lock, but good enough for a utilization metric
+        if self.pool is not None and self.pool.full():
+            self.discarded += 1
+        super()._put_conn(conn)
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with configurable keep-alive and connection pool metrics.
+
+    An adapter holds one urllib3 connection pool per host it talks to. The
+    pools are thread-safe, so a single adapter can be shared by every session
+    and script thread of a deployment.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32, pool_block: bool = False, keep_alive: bool = True, **kwargs: Any):
+        """
+        :param pool_connections: number of hosts the adapter keeps pools for
+        :param pool_maxsize: connections kept open per host
+        :param pool_block: wait for a free connection instead of opening one the pool will discard
+        :param keep_alive: reuse connections and enable TCP keep-alive on them; if False,
+                           every request asks the server to close its connection
+        :param kwargs: other arguments passed to HTTPAdapter, e.g. max_retries
+        """
+        self.keep_alive = keep_alive
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.keep_alive:
+            pool_kwargs.setdefault('socket_options', HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)])
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def add_headers(self, request, **kwargs):
+        if not self.keep_alive:
+            request.headers['Connection'] = 'close'
+
+    def pool_stats(self) -> List[Dict[str, Any]]:
+        """Returns the utilization of the adapter's connection pools, one dict per host."""
+        pools = self.poolmanager.pools
+        result = []
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            # The queue holds idle connections and None placeholders for connections not opened yet
+            queued = list(pool.pool.queue)
+            result.append({
+                'host': f'{pool.scheme}://{pool.host}:{pool.port}',
+                'maxsize': pool.pool.maxsize,
+                'in_use': pool.pool.maxsize - len(queued),
+                'idle': sum(conn is not None for conn in queued),
+                'opened': pool.num_connections,
+                'requests': pool.num_requests,
+                'discarded': pool.discarded,
+            })
+        return result
@@ -1,15 +1,61 @@
 import streamlit as st
 from utils import NASA_APIConnection
-from datetime import date as date_function
+from api_errors import NASAAPIError
+from donki_events import DonkiLinkIndex
+from exoplanet_snapshot import ExoplanetSnapshot
+from image_cache import ImageCache
+from response_cache import SQLiteResponseCache
+from result_store import ArrowResultStore
+from swr_cache import StaleWhileRevalidateCache
+from datetime import date as date_function, timedelta
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 # Assuming you have already obtained your NASA API key
 NASA_API_KEY = os.getenv('NASA_API_KEY')
+# Optional on-disk response cache shared by all app processes on this host
+NASA_RESPONSE_CACHE = os.getenv('NASA_RESPONSE_CACHE')
+# Optional directory for cached images and thumbnails
+NASA_IMAGE_CACHE = os.getenv('NASA_IMAGE_CACHE')
+# Optional directory for local snapshots of Exoplanet Archive tables
+NASA_EXOPLANET_SNAPSHOT = os.getenv('NASA_EXOPLANET_SNAPSHOT')
+# Optional seconds an expired query result is still served while it is refreshed in the background
+NASA_MAX_STALE = os.getenv('NASA_MAX_STALE')
+# Optional directory of query results shared, memory-mapped, by all sessions and app processes on this host
+NASA_RESULT_STORE = os.getenv('NASA_RESULT_STORE')
+# Set to 0 to skip fetching the default queries in the background at startup
+NASA_WARM_UP = os.getenv('NASA_WARM_UP', '1')
+
+EXOPLANET_EXAMPLE_WHERE = "koi_disposition like 'CANDIDATE' and koi_period > 300 and koi_prad < 2"
 
 # Create the NASA API connection
-nasa_conn = st.experimental_connection("nasa", type=NASA_APIConnection, api_key=NASA_API_KEY)
+nasa_conn = st.experimental_connection(
+    "nasa",
+    type=NASA_APIConnection,
+    api_key=NASA_API_KEY,
+    response_cache=SQLiteResponseCache(NASA_RESPONSE_CACHE) if NASA_RESPONSE_CACHE else None,
+    image_cache=ImageCache(NASA_IMAGE_CACHE) if NASA_IMAGE_CACHE else None,
+    exoplanet_snapshot=ExoplanetSnapshot(NASA_EXOPLANET_SNAPSHOT) if NASA_EXOPLANET_SNAPSHOT else None,
+    swr_cache=StaleWhileRevalidateCache(max_stale=float(NASA_MAX_STALE)) if NASA_MAX_STALE else None,
+    result_store=ArrowResultStore(NASA_RESULT_STORE) if NASA_RESULT_STORE else None,
+)
+
+
+@st.cache_resource
+def warm_up():
+    """Fetches what the pages show first in the background, once per process."""
+    today = date_function.today()
+    return nasa_conn.warm_up([
+        ("query_apod", ("latest",), {}),
+        ("query_neows_range", (str(today), str(today + timedelta(days=6))), {"long_format": False}),
+        ("query_donki_all", (str(today - timedelta(days=30)), str(today)), {}),
+        ("query_exoplanet_data", (), {"table": "cumulative", "where": EXOPLANET_EXAMPLE_WHERE}),
+    ])
+
+
+if NASA_WARM_UP != '0':
+    warm_up()
 
 # Streamlit app
 def main():
@@ -74,15 +120,16 @@ Join us on this cosmic adventure, where the wonders of space await! 🚀✨
  
         if st.button("Get APOD"):
             if date:
-                apod_data = nasa_conn.query_apod(date)
-
-                if apod_data is not None:
+                try:
+                    apod_data = nasa_conn.query_apod(date)
+                except NASAAPIError as e:
+                    st.error(f"Failed to fetch APOD data: {e}")
+                else:
                     st.write(f"Date: {apod_data['date'].values[0]}")
                     st.write(f"Title: {apod_data['title'].values[0]}")
-                    st.image(apod_data['url'].values[0], caption=apod_data['title'].values[0])
+                    apod_image = nasa_conn.fetch_images([apod_data['url'].values[0]], thumbnail=False)[0]
+                    st.image(apod_image, caption=apod_data['title'].values[0])
                     st.write(f"Explanation: {apod_data['explanation'].values[0]}")
-                else:
-                    st.error("Failed to fetch APOD data")
 
     elif selected_api == "Mars Rover Photos":
         st.subheader("Mars Rover Photos")
@@ -104,27 +151,22 @@ Join us on this cosmic adventure, where the wonders of space await! 🚀✨
 
         if st.button("Get Photos"):
             if sol:
-                mars_rover_photos = nasa_conn.query_mars_rover_photos(rover_name, sol)
-
-                if mars_rover_photos is not None:
+                try:
+                    mars_rover_photos = nasa_conn.query_mars_rover_photos(rover_name, sol)
+                except NASAAPIError as e:
+                    st.error(f"Failed to fetch Mars rover photos: {e}")
+                else:
                     st.write(f"Rover: {rover_name}")
-                    st.write(f"Number of Photos: 100")
+                    st.write(f"Number of Photos: {len(mars_rover_photos)}")
 
                     st.write(mars_rover_photos)
                     df = mars_rover_photos
-                    num_images = len(df)
-                    rows = (num_images // 3) + 1
 
-                    for i in range(rows):
-                        cols = min(3, num_images - i * 3)
-
-                        for j in range(cols):
-                            idx = i * 3 + j
-                            img_url = df.iloc[idx]["img_src"]
-                            st.image(img_url, caption=f"Earth Date: {df.iloc[idx]['earth_date']}", width=300)
-
-                else:
-                    st.error("Failed to fetch Mars rover photos")
+                    if len(df):
+                        # Thumbnails are downloaded concurrently and served from the image cache on later views
+                        images = nasa_conn.fetch_images(df["img_src"])
+                        captions = [f"Earth Date: {earth_date}" for earth_date in df["earth_date"]]
+                        st.image(images, caption=captions, width=300)
     elif selected_api == "Near-Earth Object Web Service (NEOWS)":
 
         st.subheader("Near-Earth Object Web Service (NEOWS)")
@@ -139,23 +181,22 @@ Join us on this cosmic adventure, where the wonders of space await! 🚀✨
             a list of near-Earth objects for the specified date range.
             """
         )
-        st.write('**Date range must be within 7 days.**')
-        st.write('Eg. startDate=2022-07-01, endDate= 2022-07-08 is valid.')
-        st.write('Eg. startDate=2022-07-01, endDate= 2022-07-09 is invalid.')
+        st.write('Longer date ranges are split into 7-day windows and fetched in parallel.')
         start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
         end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
+        long_format = st.checkbox("Show every close approach (one row per approach)")
 
         if st.button("Get Close-Approaching Objects"):
             if start_date and end_date:
-                neows_data = nasa_conn.query_neows(start_date, end_date)
-
-                if neows_data is not None:
+                try:
+                    neows_data = nasa_conn.query_neows_range(start_date, end_date, long_format=long_format)
+                except NASAAPIError as e:
+                    st.error(f"Failed to fetch NEOWS data: {e}")
+                else:
                     st.write(f"Start Date: {start_date}")
                     st.write(f"End Date: {end_date}")
 
                     st.write(neows_data)
-                else:
-                    st.error("Failed to fetch NEOWS data")                    
     elif selected_api == "DONKI: Space Weather Database":
         st.subheader("NASA DONKI Database Query")
         st.markdown(
@@ -171,91 +212,52 @@ Join us on this cosmic adventure, where the wonders of space await! 🚀✨
         st.write("**Please limit the date range gap to be a maximum of 60 days for fastest API CALL Times.**")
 
         # Event types supported by DONKI
-        donki_event_types = [
-            "Coronal Mass Ejection (CME)",
-            "Geomagnetic Storm (GST)",
-            "Solar Flare (FLR)",
-            "Solar Energetic Particle (SEP)",
-            "Magnetopause Crossing (MPC)",
-            "Radiation Belt Enhancement (RBE)",
-            "High-Speed Stream (HSS)",
-            "Notifications"
-        ]
+        donki_event_types = {
+            "Coronal Mass Ejection (CME)": "CME",
+            "Geomagnetic Storm (GST)": "GST",
+            "Solar Flare (FLR)": "FLR",
+            "Solar Energetic Particle (SEP)": "SEP",
+            "Magnetopause Crossing (MPC)": "MPC",
+            "Radiation Belt Enhancement (RBE)": "RBE",
+            "High-Speed Stream (HSS)": "HSS",
+            "Notifications": "notifications",
+            "All Event Types": None,
+        }
 
         # Sidebar menu to select DONKI event type
-        selected_donki_event = st.selectbox("Select a DONKI Event Type", donki_event_types)
-
-        if selected_donki_event == "Coronal Mass Ejection (CME)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get CME Data"):
-                if start_date and end_date:
-                    cme_data = nasa_conn.query_donki(start_date, end_date, type="CME")
-                    st.write(cme_data)
-
-        elif selected_donki_event == "Geomagnetic Storm (GST)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get GST Data"):
-                if start_date and end_date:
-                    gst_data = nasa_conn.query_donki(start_date, end_date, type="GST")
-                    st.write(gst_data)
-
-        elif selected_donki_event == "Solar Flare (FLR)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get FLR Data"):
-                if start_date and end_date:
-                    flr_data = nasa_conn.query_donki(start_date, end_date, type="FLR")
-                    st.write(flr_data)
+        selected_donki_event = st.selectbox("Select a DONKI Event Type", list(donki_event_types))
+        donki_type = donki_event_types[selected_donki_event]
 
-        elif selected_donki_event == "Solar Energetic Particle (SEP)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get SEP Data"):
-                if start_date and end_date:
-                    sep_data = nasa_conn.query_donki(start_date, end_date, type="SEP")
-                    st.write(sep_data)
-
-        elif selected_donki_event == "Magnetopause Crossing (MPC)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get MPC Data"):
-                if start_date and end_date:
-                    mpc_data = nasa_conn.query_donki(start_date, end_date, type="MPC")
-                    st.write(mpc_data)
-
-        elif selected_donki_event == "Radiation Belt Enhancement (RBE)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get RBE Data"):
-                if start_date and end_date:
-                    rbe_data = nasa_conn.query_donki(start_date, end_date, type="RBE")
-                    st.write(rbe_data)
-
-        elif selected_donki_event == "High-Speed Stream (HSS)":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
-
-            if st.button("Get HSS Data"):
-                if start_date and end_date:
-                    hss_data = nasa_conn.query_donki(start_date, end_date, type="HSS")
-                    st.write(hss_data)
-
-        elif selected_donki_event == "Notifications":
-            start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
-            end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
+        start_date = st.text_input("Enter the start date in the format 'YYYY-MM-DD':")
+        end_date = st.text_input("Enter the end date in the format 'YYYY-MM-DD':")
 
-            if st.button("Get Notifications Data"):
+        if donki_type is not None:
+            if st.button(f"Get {selected_donki_event.split('(')[-1].rstrip(')')} Data"):
                 if start_date and end_date:
-                    not_data = nasa_conn.query_donki(start_date, end_date, type="notifications")
-                    st.write(not_data)
+                    try:
+                        st.write(nasa_conn.query_donki(start_date, end_date, type=donki_type))
+                    except NASAAPIError as e:
+                        st.error(f"Failed to fetch DONKI data: {e}")
+        elif start_date and end_date:
+            # Fetched on every rerun, so the linked event lookup below survives widget changes
+            try:
+                events = nasa_conn.query_donki_all(start_date, end_date)
+            except NASAAPIError as e:
+                st.error(f"Failed to fetch DONKI data: {e}")
+                st.stop()
+            failed_types = events.attrs.get("failed_types")
+            if failed_types:
+                st.warning("Some event types could not be fetched and are missing: "
+                           + "; ".join(f"{type}: {error}" for type, error in failed_types.items()))
+            st.dataframe(events.drop(columns=["payload"]))
+
+            index = DonkiLinkIndex(events)
+            linked_events = events[events["linked_event_ids"].map(len) > 0]
+            if not linked_events.empty:
+                event_id = st.selectbox("Show events linked to", linked_events["event_id"])
+                st.write("Events that followed:")
+                st.dataframe(index.effects(event_id).drop(columns=["payload"]))
+                st.write("All linked events:", index.linked_ids(event_id))
 
     elif selected_api == "Exoplanet":
         st.subheader("NASA Exoplanet Archive Query")
@@ -270,31 +272,58 @@ Join us on this cosmic adventure, where the wonders of space await! 🚀✨
 
         # Examples to add custom queries for Exoplanet Archive
         st.write("Example 1: Query the Kepler Objects of Interest (KOI) Cumulative Table for exoplanets with a Kepler disposition of 'CANDIDATE', an orbital period (koi_period) more than 300 days, and a planet radius (koi_prad) less than 2.")
-        exo_where_example1 = "koi_disposition like 'CANDIDATE' and koi_period > 300 and koi_prad < 2"
         st.write("Query:")
         st.write("select *  from cumulative where koi_disposition like 'CANDIDATE' and koi_period > 300 and koi_prad < 2")
         if st.button("Get Exoplanet Data - Example 1"):
-            exo_data_example1 = nasa_conn.query_exoplanet_data(table="cumulative", where=exo_where_example1)
-            st.write(exo_data_example1)
+            try:
+                st.write(nasa_conn.query_exoplanet_data(table="cumulative", where=EXOPLANET_EXAMPLE_WHERE))
+            except NASAAPIError as e:
+                st.error(f"Failed to fetch Exoplanet Archive data: {e}")
 
         # Custom query input fields
         st.subheader("Custom Query")
         select = st.text_input("Enter the 'select' clause to specify columns to return (optional):", value ="*")
         where = st.text_input("Enter the 'where' clause to specify filtering conditions (optional):", value ="koi_disposition like 'CANDIDATE' and koi_period > 300 and koi_prad < 2")
         order = st.text_input("Enter the 'order' clause to specify the order of rows (optional):", value ="kepid")
+        snapshot = nasa_conn.exoplanet_snapshot is not None and st.checkbox("Run the query on a local snapshot of the table", value=True)
 
         if st.button("Run Query"):
-            exoplanet_data = nasa_conn.query_exoplanet_data(
-                table="cumulative",
-                where=where,
-                select=select,
-                order=order,
-            )
-
-            if exoplanet_data is not None:
-                st.write(exoplanet_data)
+            try:
+                exoplanet_data = nasa_conn.query_exoplanet_data(
+                    table="cumulative",
+                    where=where,
+                    select=select,
+                    order=order,
+                    snapshot=snapshot,
+                )
+            except NASAAPIError as e:
+                st.error(f"Failed to fetch Exoplanet Archive data: {e}")
             else:
-                st.error("Failed to fetch Exoplanet Archive data")
+                st.write(exoplanet_data)
+
+
+def diagnostics():
+    """Shows per-endpoint latency, payload and cache statistics of the NASA API connection."""
+    st.subheader("Diagnostics")
+    stats = nasa_conn.stats.to_dataframe()
+    if stats.empty:
+        st.write("No queries have been made yet.")
+    else:
+        st.dataframe(stats)
+    st.write("Connection pools")
+    st.dataframe(nasa_conn.pool_stats())
+    if nasa_conn.warm_up_status:
+        st.write("Warm-up", nasa_conn.warm_up_status)
+    st.write("Circuit breakers", nasa_conn.circuit_states())
+    if nasa_conn.swr_cache is not None:
+        st.write("Stale-while-revalidate cache", nasa_conn.swr_cache.stats())
+    if nasa_conn.result_store is not None:
+        st.write(f"Result store: {nasa_conn.result_store.size() / 2 ** 20:.1f} MiB of {nasa_conn.result_store.max_bytes / 2 ** 20:.0f} MiB")
+    with st.expander("Prometheus metrics"):
+        st.code(nasa_conn.stats.to_prometheus(), language="text")
+
 
 if __name__ == "__main__":
     main()
+    if st.sidebar.checkbox("Show diagnostics"):
+        diagnostics()
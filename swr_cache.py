@@ -0,0 +1,123 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _is_result(value: Any) -> bool:
+    # Failed queries raise; None results are not kept either
+    return value is not None
+
+
+class StaleWhileRevalidateCache:
+    """In-memory cache of query results that refreshes expired entries in the background.
+
+    Within ttl an entry is served as is. Once the ttl passes and for up to
+    max_stale more seconds, the stale entry is still returned immediately
+    and a background worker recomputes it. Only one refresh per key runs at a
+    time, and a failed refresh keeps the stale entry. Entries older than
+    ttl + max_stale are recomputed on the caller's thread.
+
+    Like cache_data, every caller gets its own copy of a result (copy.deepcopy;
+    for a DataFrame a deep DataFrame.copy()), so a session that modifies the
+    frame it got does not change what other sessions see.
+    """
+
+    def __init__(self, max_stale: float = 24 * 3600, max_entries: int = 256, max_workers: int = 2):
+        """
+        :param max_stale: seconds past the ttl an entry may still be served while it is refreshed
+        :param max_entries: number of entries kept; the least recently used ones are dropped first
+        :param max_workers: number of refreshes running at the same time
+        """
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counts = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0}
+
+    def get(self, key: Hashable, ttl: float, compute: Callable[[], Any], is_valid: Callable[[Any], bool] = _is_result) -> Any:
+        """Returns the cached result of compute, refreshing it in the background once it is older than ttl.
+
+        :param key: identifies the result
+        :param ttl: seconds a result is fresh for
+        :param compute: function computing the result
+        :param is_valid: whether a computed result may be cached; invalid ones are returned but not stored
+        :returns: a copy of the fresh, stale or newly computed result
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] >= ttl + self.max_stale:
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if now - entry[0] < ttl:
+                    self._counts['hits'] += 1
+                else:
+                    self._counts['stale_hits'] += 1
+                    self._schedule_refresh(key, compute, is_valid)
+            else:
+                self._counts['misses'] += 1
+
+        # Copied outside the lock; stored results are never modified, only replaced
+        if entry is not None:
+            return copy.deepcopy(entry[1])
+
+        value = compute()
+        if is_valid(value):
+            self._store(key, value)
+            return copy.deepcopy(value)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, compute: Callable[[], Any], is_valid: Callable[[Any], bool]) -> None:
+        # Called with the lock held
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='swr-refresh')
+        self._executor.submit(self._refresh, key, compute, is_valid)
+
+    def _refresh(self, key: Hashable, compute: Callable[[], Any], is_valid: Callable[[Any], bool]) -> None:
+        try:
+            value = compute()
+            if is_valid(value):
+                self._store(key, value)
+                outcome = 'refreshes'
+            else:
+                outcome = 'refresh_failures'
+        except Exception:
+            logger.warning("Refreshing %r failed, keeping the stale result", key, exc_info=True)
+            outcome = 'refresh_failures'
+        with self._lock:
+            self._refreshing.discard(key)
+            self._counts[outcome] += 1
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drops one entry, or all entries if no key is given."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit, stale hit, miss and refresh counts, and the number of entries and running refreshes."""
+        with self._lock:
+            return {**self._counts, 'entries': len(self._entries), 'refreshing': len(self._refreshing)}
@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from streamlit.logger import set_log_level  # noqa: E402
+
+import utils  # noqa: E402
+from request_scheduler import RequestScheduler  # noqa: E402
+from stub_server import StubNASAServer  # noqa: E402
+
+# Streamlit warns about the missing runtime on every cached call
+set_log_level('error')
+
+
+@pytest.fixture
+def server():
+    with StubNASAServer(size=5, latency=0.05) as server:
+        yield server
+
+
+def connect(server: StubNASAServer, connection_class=utils.NASA_APIConnection, **kwargs) -> utils.NASA_APIConnection:
+    """Connects to the stub server, with a rate limit the tests never reach and no retries."""
+    return connection_class('nasa_test', api_key='TEST_KEY', base_url=server.base_url, exoplanet_url=server.exoplanet_url,
+                            total_retries=0, scheduler=RequestScheduler(limit=10 ** 9), **kwargs)
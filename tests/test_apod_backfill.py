@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import pytest
+
+from apod_archive import APODArchive, BackfillResult
+from conftest import connect
+from request_scheduler import RateLimitExceeded
+
+
+@pytest.fixture
+def conn(server, tmp_path):
+    return connect(server, apod_archive=APODArchive(os.path.join(tmp_path, 'apod')))
+
+
+def _window(remaining):
+    """Fake _query_apod_window returning one APOD per month and the given remaining quotas in turn."""
+    remaining = iter(remaining)
+
+    def _query_apod_window(start_date, end_date, **kwargs):
+        left = next(remaining)
+        if isinstance(left, Exception):
+            raise left
+        return pd.DataFrame({'date': [start_date], 'title': [start_date]}), left
+
+    return _query_apod_window
+
+
+def test_backfill_completes_and_resumes(conn):
+    result = conn.backfill_apod('2023-05-01', '2023-07-31', max_workers=1)
+
+    assert result == BackfillResult(written=result.written, months_left=0, stopped=None)
+    assert result.written > 0
+    assert conn.backfill_apod('2023-05-01', '2023-07-31').written == 0
+
+
+def test_backfill_stops_when_the_quota_runs_low(conn, monkeypatch):
+    monkeypatch.setattr(conn, '_query_apod_window', _window([100, 40, 1000]))
+    result = conn.backfill_apod('2023-05-01', '2023-07-31', max_workers=1, min_remaining=50)
+
+    assert result == BackfillResult(written=2, months_left=1, stopped='40 requests left in the rate limit')
+    assert conn.apod_archive.is_fetched('2023-06-01', '2023-06-30')
+    assert not conn.apod_archive.is_fetched('2023-07-01', '2023-07-31')
+
+
+def test_backfill_stops_when_its_requests_are_shed(conn, monkeypatch):
+    monkeypatch.setattr(conn, '_query_apod_window', _window([100, RateLimitExceeded('apod is shed', 'apod')]))
+    result = conn.backfill_apod('2023-05-01', '2023-07-31', max_workers=1)
+
+    assert result.written == 1
+    assert result.months_left == 2
+    assert 'apod is shed' in result.stopped
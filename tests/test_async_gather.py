@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import utils
+from conftest import connect
+
+
+def test_gather_bounds_queries_in_flight(server):
+    conn = connect(server, connection_class=utils.AsyncNASA_APIConnection, max_concurrency=8)
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    get = conn._session.get
+
+    def _counting_get(*args, **kwargs):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        try:
+            return get(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    conn._session.get = _counting_get
+    days = [f'2023-07-{day:02d}' for day in range(1, 9)]
+
+    async def _main():
+        return await conn.gather(*(conn.query_apod(day) for day in days), concurrency=2)
+
+    results = asyncio.run(_main())
+
+    assert peak == 2
+    assert server.requests == len(days)
+    assert [result['date'][0] for result in results] == days
+
+
+def test_gather_returns_exceptions_in_order(server):
+    conn = connect(server, connection_class=utils.AsyncNASA_APIConnection)
+
+    async def _fail():
+        raise ValueError('boom')
+
+    async def _main():
+        return await conn.gather(conn.query_apod('2023-07-01'), _fail(), return_exceptions=True)
+
+    apod, error = asyncio.run(_main())
+
+    assert apod['date'][0] == '2023-07-01'
+    assert isinstance(error, ValueError)
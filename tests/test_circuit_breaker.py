@@ -0,0 +1,113 @@
+import pytest
+import requests
+
+import circuit_breaker
+from api_errors import CircuitOpenError, EndpointUnavailable
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from conftest import connect
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker, 'time', clock)
+    return clock
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('apod', failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_request()
+    assert excinfo.value.retry_after == pytest.approx(20)
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker('apod', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker('apod', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+    breaker.before_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker('apod', failure_threshold=5, reset_timeout=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_released_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker('apod', failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    breaker.before_request()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    breaker.before_request()
+
+
+def test_connection_fails_fast_once_open(server):
+    conn = connect(server, failure_threshold=2, reset_timeout=60)
+
+    def _unreachable(*args, **kwargs):
+        raise requests.ConnectionError('connection refused')
+
+    conn._session.get = _unreachable
+    url = server.base_url + 'planetary/apod'
+    for day in ('2023-07-01', '2023-07-02'):
+        with pytest.raises(EndpointUnavailable):
+            conn._get(url, params={'date': day})
+
+    assert conn.circuit_states() == {'apod': OPEN}
+    with pytest.raises(CircuitOpenError):
+        conn._get(url, params={'date': '2023-07-03'})
+
+
+@pytest.mark.parametrize('query', ['query_apod_range', 'query_neows_range'])
+@pytest.mark.parametrize('start_date, end_date', [('2023-07-10', '2023-07-01'), ('2023-07-01', '2023/07/10')])
+def test_invalid_dates_are_not_endpoint_errors(server, query, start_date, end_date):
+    conn = connect(server)
+
+    with pytest.raises(ValueError):
+        getattr(conn, query)(start_date, end_date)
+
+    assert server.requests == 0
+    assert all(stats['errors'] == 0 for stats in conn.stats.snapshot().values())
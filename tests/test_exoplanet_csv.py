@@ -0,0 +1,44 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from conftest import connect
+from utils import _read_exoplanet_csv
+
+CSV = b'''pl_name,koi_disposition,koi_period,koi_steff
+Kepler-1 b,CONFIRMED,10.5,5700
+Kepler-2 b,CANDIDATE,2.25,6100
+Kepler-3 b,CONFIRMED,400.0,4800
+Kepler-4 b,FALSE POSITIVE,1.0,5200
+Kepler-5 b,,3.5,5900
+'''
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 5, 100])
+def test_chunked_parsing_matches_one_pass(chunksize):
+    result = _read_exoplanet_csv(BytesIO(CSV), chunksize=chunksize)
+    expected = pd.read_csv(BytesIO(CSV))
+
+    assert isinstance(result['koi_disposition'].dtype, pd.CategoricalDtype)
+    assert list(result['koi_disposition'].cat.categories) == ['CANDIDATE', 'CONFIRMED', 'FALSE POSITIVE']
+    pd.testing.assert_frame_equal(result.astype({'koi_disposition': object}), expected, check_dtype=False)
+
+
+def test_numeric_columns_are_downcast():
+    result = _read_exoplanet_csv(BytesIO(CSV), chunksize=2)
+    assert result['koi_steff'].dtype.itemsize < 8
+    assert result['koi_period'].dtype.itemsize < 8
+
+
+def test_arrow_backed_columns():
+    result = _read_exoplanet_csv(BytesIO(CSV), arrow=True)
+    assert all(isinstance(dtype, pd.ArrowDtype) for dtype in result.dtypes)
+    assert list(result['pl_name']) == list(pd.read_csv(BytesIO(CSV))['pl_name'])
+
+
+def test_query_exoplanet_data_takes_chunksize_by_keyword(server):
+    conn = connect(server)
+    whole = conn.query_exoplanet_data('cumulative')
+    chunked = conn.query_exoplanet_data('cumulative', chunksize=7)
+    pd.testing.assert_frame_equal(chunked, whole)
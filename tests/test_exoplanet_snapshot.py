@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import connect
+from exoplanet_snapshot import ExoplanetSnapshot, query_frame
+
+FRAME = pd.DataFrame({
+    'pl_name': ['Kepler-1 b', 'Kepler-2 b', None, 'TOI-3 b'],
+    'koi_period': [10.0, np.nan, 400.0, 2.5],
+    'koi_prad': [1.5, 3.0, 1.0, np.nan],
+    'koi_disposition': pd.Categorical(['CONFIRMED', 'CANDIDATE', None, 'CANDIDATE']),
+})
+
+
+def _names(where: str):
+    return list(query_frame(FRAME, where=where)['pl_name'].fillna('<null>'))
+
+
+@pytest.mark.parametrize('where, expected', [
+    ("koi_period > 5", ['Kepler-1 b', '<null>']),
+    ("koi_period > 5 and koi_prad < 2", ['Kepler-1 b', '<null>']),
+    ("koi_period < 5 or koi_prad >= 3", ['Kepler-2 b', 'TOI-3 b']),
+    ("koi_period * 2 between 10 and 100", ['Kepler-1 b']),
+    ("koi_disposition like 'CAND%'", ['Kepler-2 b', 'TOI-3 b']),
+    ("koi_disposition in ('CONFIRMED', 'FALSE POSITIVE')", ['Kepler-1 b']),
+    ("koi_period is null", ['Kepler-2 b']),
+    ("KOI_PERIOD is not null and pl_name = 'TOI-3 b'", ['TOI-3 b']),
+])
+def test_where(where, expected):
+    assert _names(where) == expected
+
+
+@pytest.mark.parametrize('where, expected', [
+    # Predicates over nulls are unknown, and so are their negations
+    ("not koi_period > 5", ['TOI-3 b']),
+    ("koi_period not between 5 and 500", ['TOI-3 b']),
+    ("pl_name not like 'Kepler%'", ['TOI-3 b']),
+    ("koi_disposition not in ('CONFIRMED')", ['Kepler-2 b', 'TOI-3 b']),
+    ("not (koi_period > 5 or koi_prad > 2)", []),
+    ("not (koi_period > 5 and koi_prad > 2)", ['Kepler-1 b', '<null>', 'TOI-3 b']),
+    ("not koi_period > 5 or koi_period is null", ['Kepler-2 b', 'TOI-3 b']),
+    ("koi_period in (10, null)", ['Kepler-1 b']),
+    ("not koi_period in (10, null)", []),
+])
+def test_where_null_semantics(where, expected):
+    assert _names(where) == expected
+
+
+def test_select_and_order():
+    result = query_frame(FRAME, where="koi_period is not null", select='pl_name, koi_period', order='koi_period desc')
+    assert list(result.columns) == ['pl_name', 'koi_period']
+    assert list(result['koi_period']) == [400.0, 10.0, 2.5]
+
+
+@pytest.mark.parametrize('where', ["koi_period >", "unknown_column > 1", "koi_period > 1 limit 5", "koi_period ~ 1"])
+def test_unsupported_where_raises_value_error(where):
+    with pytest.raises(ValueError):
+        query_frame(FRAME, where=where)
+
+
+def test_ordering_comparison_on_categorical_raises_type_error():
+    with pytest.raises(TypeError):
+        query_frame(FRAME, where="koi_disposition > 'A'")
+
+
+@pytest.fixture
+def snapshot_conn(server, tmp_path):
+    return connect(server, exoplanet_snapshot=ExoplanetSnapshot(os.path.join(tmp_path, 'exoplanet')))
+
+
+def test_snapshot_queries_are_local_after_the_first_download(server, snapshot_conn):
+    snapshot_conn.query_exoplanet_data('cumulative', select='*', snapshot=True)
+    before = server.requests
+    result = snapshot_conn.query_exoplanet_data('cumulative', where='koi_period > 1', select='kepler_name', snapshot=True)
+
+    assert server.requests == before
+    assert list(result.columns) == ['kepler_name']
+
+
+def test_queries_without_select_run_remotely(server, snapshot_conn):
+    snapshot_conn.query_exoplanet_data('cumulative', select='*', snapshot=True)
+    before = server.requests
+    snapshot_conn.query_exoplanet_data('cumulative', snapshot=True)
+
+    assert server.requests == before + 1
+
+
+@pytest.mark.parametrize('table', ['../cumulative', 'cumulative.parquet', '', 'a/b'])
+def test_invalid_table_names_are_rejected(tmp_path, table):
+    with pytest.raises(ValueError):
+        ExoplanetSnapshot(str(tmp_path)).load(table, lambda table: pd.DataFrame())
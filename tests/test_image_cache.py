@@ -0,0 +1,19 @@
+import logging
+import os
+
+import requests
+
+from image_cache import ImageCache
+
+
+def test_failed_downloads_are_logged_and_returned_as_none(server, tmp_path, caplog):
+    cache = ImageCache(os.path.join(tmp_path, 'images'))
+    missing = server.base_url + 'missing.jpg'
+    not_an_image = server.base_url + 'planetary/apod?date=2023-07-01'
+
+    with requests.Session() as session, caplog.at_level(logging.WARNING, logger='image_cache'):
+        paths = cache.prefetch(session, [missing, not_an_image])
+
+    assert paths == [None, None]
+    assert [record.getMessage() for record in caplog.records] == [
+        f"Failed to download image {missing}: 404 Client Error: Not Found for url: {missing}"]
@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+import pytest
+
+from conftest import connect
+from json_records import iter_json_array, records_to_frame
+
+RECORDS = [
+    {'activityID': '2023-07-01-CME-001', 'speed': 512.5, 'linkedEvents': [{'activityID': 'x'}]},
+    {'activityID': '2023-07-02-CME-001', 'speed': 1.5e3, 'note': 'café "quoted" ]'},
+    {'activityID': '2023-07-03-CME-001', 'speed': -12, 'linkedEvents': None},
+]
+
+
+def _chunks(body: bytes, size: int):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64, 100000])
+def test_iter_json_array_any_chunk_size(size):
+    body = json.dumps(RECORDS, indent=1).encode()
+    assert list(iter_json_array(_chunks(body, size))) == RECORDS
+
+
+def test_iter_json_array_numbers_split_across_chunks():
+    assert list(iter_json_array([b'[1', b'2.5e', b'3, 4', b'0]'])) == [12.5e3, 40]
+
+
+@pytest.mark.parametrize('body', [b'', b'  \n', b'[]', b' [ ] '])
+def test_iter_json_array_empty(body):
+    assert list(iter_json_array(_chunks(body, 1))) == []
+
+
+@pytest.mark.parametrize('body', [b'{"a": 1}', b'[1, 2', b'[1 2]', b'[,1]', b'[1,]', b'[1,,2]', b'[1] 2', b'[1]]', b'[] []'])
+def test_iter_json_array_malformed(body):
+    with pytest.raises(ValueError):
+        list(iter_json_array([body]))
+
+
+@pytest.mark.parametrize('size', [1, 3, 100])
+def test_iter_json_array_trailing_whitespace(size):
+    assert list(iter_json_array(_chunks(b' [1, [2], {"a": 3}] \n ', size))) == [1, [2], {'a': 3}]
+
+
+def test_records_to_frame_matches_dataframe():
+    expected = pd.DataFrame(RECORDS)
+    result = records_to_frame(iter_json_array([json.dumps(RECORDS).encode()]))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_streamed_donki_query_matches_the_buffered_one(server):
+    conn = connect(server)
+    buffered = conn.query_donki('2023-07-01', '2023-07-03', type='CME')
+    streamed = conn.query_donki('2023-07-01', '2023-07-03', type='CME', stream=True)
+    pd.testing.assert_frame_equal(streamed, buffered)
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+import utils
+from conftest import connect
+from stub_server import StubNASAServer
+
+
+@pytest.fixture
+def large_server():
+    # 60 photos: two full pages and a partial one
+    with StubNASAServer(size=60, latency=0.01) as server:
+        yield server
+
+
+def test_pages_are_fetched_until_a_partial_page(large_server):
+    conn = connect(large_server)
+    # Without prefetching, nothing is requested past the partial page
+    batches = list(conn.iter_mars_rover_photos('curiosity', 1000, prefetch=1))
+
+    assert [len(batch) for batch in batches] == [25, 25, 10]
+    assert large_server.requests == 3
+    assert list(batches[0]['id'].iloc[:2]) == [100000000, 100000001]
+
+
+def test_single_page_sols_take_one_request(server):
+    conn = connect(server)
+    result = conn.query_mars_rover_photos('curiosity', 1000)
+
+    assert len(result) == 5
+    assert server.requests == 1
+
+
+def test_limit_only_fetches_the_pages_it_needs(large_server):
+    conn = connect(large_server)
+    result = conn.query_mars_rover_photos('curiosity', 1000, limit=30)
+
+    assert len(result) == 30
+    assert large_server.requests == 2
+
+
+@pytest.mark.parametrize('prefetch', [1, 2, 3])
+def test_prefetch_window(monkeypatch, server, prefetch):
+    conn = connect(server)
+    requested = []
+    lock = threading.Lock()
+
+    def _page(rover_name, sol, page, camera=None, **kwargs):
+        with lock:
+            requested.append(page)
+        return [{'id': page * 100 + i} for i in range(utils.MARS_ROVER_PAGE_SIZE if page < 8 else 3)]
+
+    monkeypatch.setattr(conn, '_query_mars_rover_page', _page)
+
+    for consumed, batch in enumerate(conn.iter_mars_rover_photos('curiosity', 1000, prefetch=prefetch), start=1):
+        if consumed == 1:
+            # Page 1 is fetched on its own, most sols fit on it
+            assert requested == [1]
+        # Never more than `prefetch` pages ahead of the consumer
+        assert len(requested) <= consumed + prefetch - 1
+
+    # Pages after the partial page 8 may have been fetched ahead, but not further
+    assert consumed == 8
+    assert sorted(requested)[:8] == list(range(1, 9))
+    assert len(requested) <= 8 + prefetch - 1
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from conftest import connect
+from query_batch import QuerySpec
+
+EXOPLANET_HOST = 'http://exoplanet.invalid/'
+
+
+def test_specs_spelled_differently_run_once(server):
+    conn = connect(server)
+    specs = [
+        QuerySpec.of('query_apod', '2023-07-01'),
+        QuerySpec.of('query_apod', date='2023-07-01'),
+        QuerySpec.of('query_apod', '2023-07-01', cache_time=3600),
+        QuerySpec.of('query_apod', '2023-07-01'),
+        QuerySpec.of('query_apod', '2023-07-02'),
+    ]
+
+    results = list(conn.query_many(specs))
+
+    assert server.requests == 2
+    assert Counter(result.spec for result in results) == Counter(dict.fromkeys(specs[:3] + specs[4:], 1))
+    assert all(result.error is None for result in results)
+    assert sorted(result.data.loc[0, 'date'] for result in results) == ['2023-07-01'] * 3 + ['2023-07-02']
+
+
+def test_invalid_specs_raise_value_error(server):
+    conn = connect(server)
+    with pytest.raises(ValueError):
+        list(conn.query_many([QuerySpec.of('query_apod')]))
+    with pytest.raises(ValueError):
+        list(conn.query_many([QuerySpec.of('_get', 'url')]))
+
+
+def test_hosts_have_their_own_limits(server, monkeypatch):
+    conn = connect(server)
+    conn.exoplanet_url = EXOPLANET_HOST + 'nph-nstedAPI?'
+    running = Counter()
+    peak = Counter()
+    lock = threading.Lock()
+
+    def _call_query(name, **kwargs):
+        with lock:
+            running[name] += 1
+            peak[name] = max(peak[name], running[name])
+        time.sleep(0.05)
+        with lock:
+            running[name] -= 1
+        return name
+
+    monkeypatch.setattr(conn, '_call_query', _call_query)
+    specs = ([QuerySpec.of('query_exoplanet_data', 'cumulative', where=f'koi_period>{i}') for i in range(6)]
+             + [QuerySpec.of('query_apod', f'2023-07-{day:02}') for day in range(1, 7)])
+
+    results = list(conn.query_many(specs, max_workers_per_host=3, host_limits={EXOPLANET_HOST: 1}))
+
+    assert len(results) == 12
+    assert peak['query_exoplanet_data'] == 1
+    assert 1 < peak['query_apod'] <= 3
+
+
+def test_nested_fan_outs_run_one_request_at_a_time(server, monkeypatch):
+    conn = connect(server)
+    calls = []
+    monkeypatch.setattr(conn, '_call_query', lambda name, **kwargs: calls.append((name, kwargs['max_workers'])))
+
+    list(conn.query_many([QuerySpec.of('query_neows_range', '2023-07-01', '2023-07-31', max_workers=4)]))
+
+    assert calls == [('query_neows_range', 1)]
+
+
+def test_failed_queries_do_not_stop_the_batch(server):
+    conn = connect(server)
+    specs = [QuerySpec.of('query_apod', '2023-07-01'), QuerySpec.of('query_apod_range', '2023-07-10', '2023-07-01')]
+
+    results = {result.spec: result for result in conn.query_many(specs)}
+
+    assert results[specs[0]].error is None
+    assert isinstance(results[specs[1]].error, ValueError)
+    assert results[specs[1]].data is None
@@ -0,0 +1,26 @@
+import inspect
+
+import pytest
+
+import utils
+
+# Positional parameters of the original query methods; new options are keyword-only
+# so that existing positional calls still pass cache_time where they did before
+POSITIONAL_PARAMETERS = {
+    'query_apod': ['date', 'cache_time'],
+    'query_neows': ['start_date', 'end_date', 'cache_time'],
+    'query_mars_rover_photos': ['rover_name', 'sol', 'cache_time'],
+    'query_donki': ['start_date', 'end_date', 'type', 'cache_time'],
+    'query_exoplanet_data': ['table', 'where', 'select', 'order', 'format', 'cache_time'],
+}
+
+
+def _positional(method):
+    return [name for name, parameter in inspect.signature(method).parameters.items()
+            if name != 'self' and parameter.kind == parameter.POSITIONAL_OR_KEYWORD]
+
+
+@pytest.mark.parametrize('connection_class', [utils.NASA_APIConnection, utils.AsyncNASA_APIConnection])
+@pytest.mark.parametrize('name, expected', POSITIONAL_PARAMETERS.items())
+def test_original_positional_parameters_are_kept(connection_class, name, expected):
+    assert _positional(getattr(connection_class, name)) == expected
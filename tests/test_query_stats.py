@@ -0,0 +1,39 @@
+import os
+
+from conftest import connect
+from response_cache import SQLiteResponseCache
+from swr_cache import StaleWhileRevalidateCache
+
+
+def test_donki_all_counts_one_call_per_type(server):
+    conn = connect(server, swr_cache=StaleWhileRevalidateCache())
+
+    for _ in range(2):
+        conn.query_donki_all('2023-07-01', '2023-07-02', types=['CME', 'GST', 'CME', 'FLR'])
+
+    stats = conn.stats.snapshot()['donki']
+    assert stats['cache_misses'] == 3
+    assert stats['cache_hits'] == 3
+
+
+def test_requests_record_bytes_read_off_the_wire(server):
+    conn = connect(server)
+    response = conn._get(server.base_url + 'planetary/apod', params={'date': '2023-07-01'})
+
+    stats = conn.stats.snapshot()['apod']
+    assert stats['requests'] == 1
+    assert stats['bytes'] == len(response.content) > 0
+    assert stats['latency']['network']['count'] == 1
+
+
+def test_revalidations_count_as_requests(server, tmp_path):
+    conn = connect(server, response_cache=SQLiteResponseCache(os.path.join(tmp_path, 'responses.sqlite'), max_age=0))
+    url = server.base_url + 'planetary/apod'
+    first = conn._get(url, params={'date': '2023-07-01'})
+    conn._get(url, params={'date': '2023-07-01'})
+
+    stats = conn.stats.snapshot()['apod']
+    assert server.requests == 2
+    assert stats['requests'] == 2
+    # The 304 has no body, the cached one is not transferred again
+    assert stats['bytes'] == len(first.content)
@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import connect
+from request_scheduler import PRIORITY_HIGH, PRIORITY_LOW, RateLimitExceeded, RequestScheduler
+
+
+def test_run_coalesces_identical_requests():
+    scheduler = RequestScheduler()
+    calls = 0
+    started = threading.Event()
+
+    def _request():
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(scheduler.run, 'key', _request)
+        started.wait()
+        followers = [executor.submit(scheduler.run, 'key', _request) for _ in range(4)]
+        results = [leader.result()] + [future.result() for future in followers]
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_run_shares_errors_and_forgets_finished_requests():
+    scheduler = RequestScheduler()
+    started = threading.Event()
+
+    def _fail():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(scheduler.run, 'key', _fail)
+        started.wait()
+        follower = executor.submit(scheduler.run, 'key', lambda: 'not called')
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert scheduler.run('key', lambda: 'fresh') == 'fresh'
+
+
+def test_connection_coalesces_identical_gets(server):
+    conn = connect(server)
+    url = server.base_url + 'planetary/apod'
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: conn._get(url, params={'date': '2023-07-01'}), range(5)))
+
+    assert server.requests == 1
+    assert {response.content for response in responses} == {responses[0].content}
+
+
+def test_small_limits_leave_room_for_requests():
+    scheduler = RequestScheduler(reserve=50, max_wait=0.1)
+    scheduler.update(200, {'X-RateLimit-Limit': '40', 'X-RateLimit-Remaining': '39'})
+    scheduler.acquire()
+    assert scheduler.remaining == pytest.approx(38, abs=0.01)
+
+
+def test_low_priority_requests_are_shed_at_the_reserve():
+    scheduler = RequestScheduler(limit=1000, reserve=50, max_wait=0.1)
+    scheduler.update(200, {'X-RateLimit-Remaining': '50'})
+
+    with pytest.raises(RateLimitExceeded):
+        scheduler.acquire(PRIORITY_LOW)
+    scheduler.acquire(PRIORITY_HIGH)
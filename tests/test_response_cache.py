@@ -0,0 +1,72 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import connect
+from response_cache import CachedResponse, ResponseCache, SQLiteResponseCache, make_cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SQLiteResponseCache(os.path.join(tmp_path, 'responses.sqlite'), max_age=0)
+
+
+def test_stale_entries_are_revalidated_with_a_304(server, cache):
+    conn = connect(server, response_cache=cache)
+    url = server.base_url + 'planetary/apod'
+    params = {'date': '2023-07-02', 'api_key': 'TEST_KEY'}
+
+    first = conn._get(url, params=params)
+    stored_at = cache.get(make_cache_key(url, params)).stored_at
+    second = conn._get(url, params=params)
+
+    assert server.requests == 2
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert cache.get(make_cache_key(url, params)).stored_at > stored_at
+
+
+def test_fresh_entries_skip_the_network(server, tmp_path):
+    conn = connect(server, response_cache=SQLiteResponseCache(os.path.join(tmp_path, 'fresh.sqlite'), max_age=3600))
+    url = server.base_url + 'planetary/apod'
+
+    for _ in range(3):
+        conn._get(url, params={'date': '2023-07-02', 'api_key': 'TEST_KEY'})
+
+    assert server.requests == 1
+
+
+def test_api_key_is_not_stored(server, cache):
+    conn = connect(server, response_cache=cache)
+    conn._get(server.base_url + 'planetary/apod', params={'date': '2023-07-02', 'api_key': 'TEST_KEY'})
+
+    with sqlite3.connect(cache.path) as db:
+        (url,) = db.execute('SELECT url FROM responses').fetchone()
+    assert url.endswith('planetary/apod?date=2023-07-02')
+    assert 'TEST_KEY' not in url
+
+
+def test_streamed_requests_bypass_the_cache(server, cache):
+    conn = connect(server, response_cache=cache)
+    conn._get(server.base_url + 'planetary/apod', params={'date': '2023-07-02'}, stream=True).content
+
+    assert cache.size() == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SQLiteResponseCache(os.path.join(tmp_path, 'small.sqlite'), max_bytes=10)
+    cache.set('a', CachedResponse('u', b'aaaa', {}, 0))
+    cache.set('b', CachedResponse('u', b'bbbb', {}, 0))
+    assert cache.get('a') is not None
+    cache.set('c', CachedResponse('u', b'cccc', {}, 0))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.size() == 8
+
+
+def test_response_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCache()
@@ -0,0 +1,57 @@
+import os
+
+import pandas as pd
+import pytest
+
+import utils
+from conftest import connect
+from result_store import ArrowResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArrowResultStore(os.path.join(tmp_path, 'results'))
+
+
+def test_stored_results_are_read_only_views(store):
+    frame = pd.DataFrame({'date': ['2023-07-01', '2023-07-02'], 'speed': [512.5, 1.5e3]})
+    stored = store.put('key', frame)
+
+    assert isinstance(stored['speed'].dtype, pd.ArrowDtype)
+    pd.testing.assert_frame_equal(stored.astype(object), frame.astype(object))
+    pd.testing.assert_frame_equal(store.get('key', ttl=60), stored)
+    assert store.get('key', ttl=0) is None
+
+
+@pytest.mark.parametrize('frame', [
+    pd.DataFrame({'linkedEvents': [[{'activityID': 'x'}], None]}),
+    pd.DataFrame({'camera': [{'name': 'FHAZ'}, {'name': 'RHAZ', 'id': 1}]}),
+    pd.DataFrame({'mixed': [1, 'a']}),
+])
+def test_nested_and_unstorable_frames_are_not_stored(store, frame):
+    assert store.put('key', frame) is None
+    assert store.get('key', ttl=60) is None
+    assert store.size() == 0
+
+
+def test_unstorable_results_are_left_to_cache_data(server, store):
+    conn = connect(server, result_store=store)
+
+    # DONKI events hold nested linkedEvents lists
+    for _ in range(2):
+        result = conn.query_donki('2023-07-01', '2023-07-02', type='CME')
+
+    assert len(result) > 0
+    assert store.size() == 0
+    assert len(conn._unstored) == 1
+
+
+def test_unstorable_keys_are_bounded(server, store, monkeypatch):
+    monkeypatch.setattr(utils, 'UNSTORED_MAX_ENTRIES', 2)
+    conn = connect(server, result_store=store)
+
+    for day in ('01', '02', '03'):
+        conn.query_donki(f'2023-07-{day}', f'2023-07-{day}', type='CME')
+
+    assert len(conn._unstored) == 2
+    assert not any("'2023-07-01'" in key for key in conn._unstored)
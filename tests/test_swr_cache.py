@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import swr_cache
+from swr_cache import StaleWhileRevalidateCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(swr_cache, 'time', clock)
+    return clock
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_callers_get_their_own_copy(clock):
+    cache = StaleWhileRevalidateCache()
+    compute = lambda: pd.DataFrame({'date': ['2023-07-01']})
+
+    first = cache.get('apod', 60, compute)
+    first.loc[0, 'date'] = 'modified'
+    second = cache.get('apod', 60, compute)
+
+    assert second is not first
+    assert second.loc[0, 'date'] == '2023-07-01'
+    assert cache.stats()['hits'] == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    cache = StaleWhileRevalidateCache(max_stale=600)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(len(calls))
+        if len(calls) > 1:
+            release.wait(5)
+        return len(calls)
+
+    assert cache.get('key', 60, compute) == 1
+    clock.now += 61
+
+    # Both callers get the stale result straight away, and only one refresh starts
+    assert cache.get('key', 60, compute) == 1
+    assert cache.get('key', 60, compute) == 1
+    assert cache.stats()['refreshing'] == 1
+
+    release.set()
+    _wait_for(lambda: cache.stats()['refreshes'] == 1)
+    assert len(calls) == 2
+    assert cache.get('key', 60, compute) == 2
+    assert cache.stats()['stale_hits'] == 2
+
+
+def test_failed_refresh_keeps_the_stale_entry(clock):
+    cache = StaleWhileRevalidateCache(max_stale=600)
+    cache.get('key', 60, lambda: 'stale')
+    clock.now += 61
+
+    def fail():
+        raise ValueError('endpoint down')
+
+    assert cache.get('key', 60, fail) == 'stale'
+    _wait_for(lambda: cache.stats()['refresh_failures'] == 1)
+    assert cache.get('key', 60, fail) == 'stale'
+
+
+def test_entries_past_max_stale_are_recomputed_on_the_caller(clock):
+    cache = StaleWhileRevalidateCache(max_stale=600)
+    cache.get('key', 60, lambda: 'old')
+    clock.now += 661
+
+    assert cache.get('key', 60, lambda: 'new') == 'new'
+    assert cache.stats()['misses'] == 2
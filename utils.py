@@ -1,26 +1,383 @@
+import asyncio
+import inspect
+import itertools
+import logging
 import re
-from io import StringIO
-from typing import Any, Generator, Tuple, Optional, List
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import date as date_type, datetime, timedelta
+from io import BytesIO
+from typing import Any, BinaryIO, Callable, Dict, Generator, Iterable, Tuple, Optional, List
+from urllib.parse import urlparse
 import requests
-from requests.adapters import HTTPAdapter
 from streamlit.connections import ExperimentalBaseConnection
 from streamlit.runtime.caching import cache_data
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from urllib3 import Retry
 
+from api_errors import CircuitOpenError, EndpointUnavailable, HTTPStatusError, InvalidResponse, NASAAPIError
+from apod_archive import APODArchive, BackfillResult
+from circuit_breaker import CircuitBreaker, ErrorCache
+from donki_events import DONKI_ALL_TYPES, normalize_donki_events
+from donki_store import DonkiEventStore, donki_event_fields
+from exoplanet_snapshot import ExoplanetSnapshot
+from image_cache import ImageCache
+from json_records import iter_json_array, loads, records_to_frame
+from query_batch import QueryResult, QuerySpec
+from query_stats import QueryStats
+from request_scheduler import PRIORITY_LOW, PRIORITY_NORMAL, RateLimitExceeded, RequestScheduler
+from response_cache import ResponseCache, make_cache_key
+from result_store import ArrowResultStore
+from session_pool import PooledHTTPAdapter
+from swr_cache import StaleWhileRevalidateCache
+
+logger = logging.getLogger(__name__)
+
+# NEOWS feed only accepts ranges of up to 7 days
+NEOWS_MAX_WINDOW_DAYS = 7
+
+# First day with an Astronomy Picture Of The Day
+APOD_FIRST_DATE = '1995-06-16'
+
+# Mars Rover Photos returns 25 photos per page
+MARS_ROVER_PAGE_SIZE = 25
+MARS_ROVER_MAX_PREFETCH = 4
+
+# Exoplanet Archive columns with a small set of repeated values, parsed as categoricals
+EXOPLANET_CATEGORICAL_COLUMNS = {
+    'koi_disposition', 'koi_pdisposition', 'koi_vet_stat', 'koi_fittype', 'koi_limbdark_mod',
+    'koi_parm_prov', 'koi_sparprov', 'koi_trans_mod', 'koi_tce_delivname', 'koi_quarters',
+    'disposition', 'tfopwg_disp', 'discoverymethod', 'disc_facility', 'disc_locale',
+    'disc_telescope', 'disc_instrument', 'soltype', 'pl_letter', 'st_metratio', 'st_spectype',
+}
+EXOPLANET_CSV_CHUNKSIZE = 50000
+
+# Bytes read from the socket at a time when a JSON body is decoded while it downloads
+JSON_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Path prefixes below base_url and the endpoint names they are reported under
+ENDPOINT_NAMES = (
+    ('planetary/apod', 'apod'),
+    ('neo/rest/v1/feed', 'neows'),
+    ('mars-photos/', 'mars_rover_photos'),
+    ('DONKI/', 'donki'),
+)
+
+# Keys of results the result store cannot hold that are remembered; the least recently used are forgotten first
+UNSTORED_MAX_ENTRIES = 1024
+
+
+def _neows_windows(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    """Splits a date range into 7-day NEOWS windows.
+
+    Windows are aligned to Mondays rather than to start_date, so overlapping
+    ranges map onto the same windows and can share cached results.
+
+    :param start_date: start date in the format 'YYYY-MM-DD'
+    :param end_date: end date in the format 'YYYY-MM-DD'
+    :returns: list of (window_start, window_end) date strings
+    """
+    start = date_type.fromisoformat(start_date)
+    end = date_type.fromisoformat(end_date)
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    window_start = start - timedelta(days=start.weekday())
+    windows = []
+    while window_start <= end:
+        window_end = window_start + timedelta(days=NEOWS_MAX_WINDOW_DAYS - 1)
+        windows.append((window_start.isoformat(), window_end.isoformat()))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+
+def _date_chunks(start_date: str, end_date: str, days: int) -> List[Tuple[str, str]]:
+    """Splits a date range into consecutive chunks of at most `days` days.
+
+    :param start_date: start date in the format 'YYYY-MM-DD'
+    :param end_date: end date in the format 'YYYY-MM-DD'
+    :param days: maximum length of a chunk in days
+    :returns: list of (chunk_start, chunk_end) date strings
+    """
+    start = date_type.fromisoformat(start_date)
+    end = date_type.fromisoformat(end_date)
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _month_chunks(start_date: str, end_date: str) -> List[Tuple[str, str]]:
+    """Splits a date range into calendar months, clipped to the range.
+
+    :param start_date: start date in the format 'YYYY-MM-DD'
+    :param end_date: end date in the format 'YYYY-MM-DD'
+    :returns: list of (chunk_start, chunk_end) date strings
+    """
+    start = date_type.fromisoformat(start_date)
+    end = date_type.fromisoformat(end_date)
+    if end < start:
+        raise ValueError(f"end_date {end_date} is before start_date {start_date}")
+
+    chunks = []
+    while start <= end:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        chunk_end = min(next_month - timedelta(days=1), end)
+        chunks.append((start.isoformat(), chunk_end.isoformat()))
+        start = next_month
+    return chunks
+
+
+def _map_concurrent(func: Callable, items: Iterable, max_workers: int) -> List[Any]:
+    """Applies func to every item on a thread pool and returns results in order.
+
+    Worker threads inherit the Streamlit script context of the caller, so
+    cached functions called from them behave as they do on the script thread.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def _init_worker():
+        if ctx is not None:
+            add_script_run_ctx(ctx=ctx)
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        return list(executor.map(func, items))
+
+
+def _describe_call(name: str, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """Formats a method call for display, e.g. "query_apod('latest')"."""
+    arguments = [repr(arg) for arg in args] + [f'{key}={value!r}' for key, value in kwargs.items()]
+    return f"{name}({', '.join(arguments)})"
+
+
+def _repeat(values: List[Any], counts: Optional[List[int]], dtype: Any = object) -> np.ndarray:
+    """Builds a typed column, repeating each value counts[i] times when counts is given."""
+    column = np.asarray(values, dtype=dtype)
+    if counts is None:
+        return column
+    return np.repeat(column, counts)
+
+
+def _normalize_neows(data: dict, long_format: bool = False) -> pd.DataFrame:
+    """Normalizes a NEOWS feed response into a DataFrame, column by column.
+
+    Numeric fields, which the API returns as strings, are converted to floats.
+
+    :param data: decoded NEOWS feed response
+    :param long_format: emit one row per (object, close approach) instead of one row per object
+    :returns: result as a DataFrame
+    """
+    objects = [obj for objs in data['near_earth_objects'].values() for obj in objs]
+
+    if long_format:
+        counts = [len(obj['close_approach_data']) for obj in objects]
+        approaches = [approach for obj in objects for approach in obj['close_approach_data']]
+    else:
+        counts = None
+        approaches = [obj['close_approach_data'][0] for obj in objects]
+
+    diameters_km = [obj['estimated_diameter']['kilometers'] for obj in objects]
+    diameters_m = [obj['estimated_diameter']['meters'] for obj in objects]
+
+    columns = {
+        'id': _repeat([obj['id'] for obj in objects], counts),
+        'name': _repeat([obj['name'] for obj in objects], counts),
+        'neo_reference_id': _repeat([obj['neo_reference_id'] for obj in objects], counts),
+        'close_approach_date': np.asarray([a['close_approach_date'] for a in approaches], dtype=object),
+        'nasa_jpl_url': _repeat([obj['nasa_jpl_url'] for obj in objects], counts),
+        'absolute_magnitude_h': _repeat([obj['absolute_magnitude_h'] for obj in objects], counts, float),
+        'estimated_diameter_min_km': _repeat([d['estimated_diameter_min'] for d in diameters_km], counts, float),
+        'estimated_diameter_max_km': _repeat([d['estimated_diameter_max'] for d in diameters_km], counts, float),
+        'estimated_diameter_min_m': _repeat([d['estimated_diameter_min'] for d in diameters_m], counts, float),
+        'estimated_diameter_max_m': _repeat([d['estimated_diameter_max'] for d in diameters_m], counts, float),
+        'is_potentially_hazardous_asteroid': _repeat([obj['is_potentially_hazardous_asteroid'] for obj in objects], counts, bool),
+        'epoch_date_close_approach': np.asarray([a['epoch_date_close_approach'] for a in approaches], dtype=np.int64),
+        'relative_velocity_kms': np.asarray([a['relative_velocity']['kilometers_per_second'] for a in approaches], dtype=float),
+        'miss_distance_km': np.asarray([a['miss_distance']['kilometers'] for a in approaches], dtype=float),
+        'orbiting_body': np.asarray([a['orbiting_body'] for a in approaches], dtype=object),
+    }
+
+    return pd.DataFrame(columns)
+
+
+def _as_api_error(endpoint: str, error: Exception) -> NASAAPIError:
+    """Wraps an exception raised while running a query into the matching NASAAPIError."""
+    if isinstance(error, NASAAPIError):
+        return error
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return HTTPStatusError(str(error), endpoint, status_code=error.response.status_code)
+    if isinstance(error, requests.RequestException):
+        return EndpointUnavailable(str(error), endpoint)
+    return InvalidResponse(f"Could not process the {endpoint} response: {error}", endpoint)
+
+
+def _origin(url: str) -> str:
+    """Returns the scheme and host of a URL as a session mount prefix."""
+    parsed = urlparse(url)
+    return f'{parsed.scheme}://{parsed.netloc}/'
+
+
+def _response_stream(response: requests.Response) -> BinaryIO:
+    """Returns a file-like object over the body of a response.
+
+    Streamed responses are read straight from the socket; responses whose body
+    was already loaded (e.g. served from the response cache) are wrapped in BytesIO.
+    """
+    if response.raw is None or response._content_consumed:
+        return BytesIO(response.content)
+    response.raw.decode_content = True
+    return response.raw
+
+
+def _read_json_records(response: requests.Response) -> pd.DataFrame:
+    """Decodes a response whose body is a JSON array of records into a DataFrame.
+
+    Streamed bodies (stream=True) still on the socket are decoded item by
+    item as they download, straight into columns, so decoding overlaps the
+    transfer. Other bodies are decoded in one go, with orjson if it is
+    installed. An empty body is an empty DataFrame.
+    """
+    if response.raw is None or response._content_consumed:
+        records = loads(response.content) if response.content.strip() else []
+        return pd.DataFrame(records)
+    return records_to_frame(iter_json_array(response.iter_content(JSON_STREAM_CHUNK_SIZE)))
+
+
+def _is_exoplanet_categorical(column: str) -> bool:
+    return column in EXOPLANET_CATEGORICAL_COLUMNS or column.endswith('_disposition')
+
+
+def _downcast_exoplanet_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Downcasts the numeric columns of a parsed CSV chunk to the smallest dtype that holds them.
+
+    Float columns are only downcast to float32 when that loses no precision.
+    """
+    for column, dtype in chunk.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype):
+            chunk[column] = pd.to_numeric(chunk[column], downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype):
+            values = chunk[column].to_numpy()
+            downcast = values.astype(np.float32)
+            if np.array_equal(downcast.astype(np.float64), values, equal_nan=True):
+                chunk[column] = downcast
+    return chunk
+
+
+def _read_exoplanet_csv(stream: BinaryIO, chunksize: int = EXOPLANET_CSV_CHUNKSIZE, arrow: bool = False) -> pd.DataFrame:
+    """Parses an Exoplanet Archive CSV body in chunks with compact dtypes.
+
+    Numeric columns are downcast and disposition-style columns become
+    categoricals chunk by chunk, so the full table is never held with default
+    dtypes; the chunks' categories are unified when they are combined.
+
+    :param stream: file-like object over the CSV body
+    :param chunksize: number of rows parsed at a time
+    :param arrow: parse with pyarrow and return Arrow-backed columns
+    :returns: result as a DataFrame
+    """
+    if arrow:
+        from pyarrow import csv as pa_csv
+
+        table = pa_csv.read_csv(stream)
+        for i, name in enumerate(table.column_names):
+            if _is_exoplanet_categorical(name) and table.schema.field(name).type == 'string':
+                table = table.set_column(i, name, table.column(name).dictionary_encode())
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+    frames = []
+    categorical_columns = None
+    for chunk in pd.read_csv(stream, chunksize=chunksize):
+        if categorical_columns is None:
+            categorical_columns = [column for column in chunk.columns if _is_exoplanet_categorical(column)]
+        for column in categorical_columns:
+            chunk[column] = chunk[column].astype('category')
+        frames.append(_downcast_exoplanet_chunk(chunk))
+
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    # Chunks with the same categories concatenate into a categorical, others into object strings
+    for column in categorical_columns:
+        parts = [frame[column] for frame in frames if len(frame[column].cat.categories)]
+        if parts:
+            categories = union_categoricals(parts, sort_categories=True).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
 class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
     """Basic st.experimental_connection implementation for NASA API"""
 
     def __init__(self, connection_name: str,
                  api_key: str,
                  base_url: str = 'https://api.nasa.gov/',
+                 exoplanet_url: str = 'https://exoplanetarchive.ipac.caltech.edu/cgi-bin/nstedAPI/nph-nstedAPI?',
                  total_retries: int = 5,
                  backoff_factor: float = 0.25,
                  status_forcelist: List[int] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 donki_store: Optional[DonkiEventStore] = None,
+                 image_cache: Optional[ImageCache] = None,
+                 apod_archive: Optional[APODArchive] = None,
+                 exoplanet_snapshot: Optional[ExoplanetSnapshot] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 stats: Optional[QueryStats] = None,
+                 swr_cache: Optional[StaleWhileRevalidateCache] = None,
+                 result_store: Optional[ArrowResultStore] = None,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30,
+                 error_cache_time: float = 30,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 32,
+                 pool_block: bool = False,
+                 host_pool_maxsize: Optional[Dict[str, int]] = None,
+                 keep_alive: bool = True,
+                 thread_local_sessions: bool = False,
                  **kwargs):
 
         self.api_key = api_key
         self.base_url = base_url
+        self.exoplanet_url = exoplanet_url
+        self.response_cache = response_cache
+        self.donki_store = donki_store
+        self.image_cache = image_cache
+        self.apod_archive = apod_archive
+        self.exoplanet_snapshot = exoplanet_snapshot
+        self.scheduler = scheduler if scheduler is not None else RequestScheduler()
+        self.stats = stats if stats is not None else QueryStats()
+        self.swr_cache = swr_cache
+        self.result_store = result_store
+        # Keys of results the result store cannot hold, left to cache_data
+        self._unstored: 'OrderedDict[str, None]' = OrderedDict()
+        self._unstored_lock = threading.Lock()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.error_cache = ErrorCache(ttl=error_cache_time)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        # Pool sizes of other hosts, keyed by URL prefix (e.g. 'https://mars.nasa.gov/')
+        self.host_pool_maxsize = host_pool_maxsize or {}
+        self.keep_alive = keep_alive
+        self.thread_local_sessions = thread_local_sessions
+        self._local = threading.local()
+        # Outcome of every warm_up query, keyed by the call
+        self.warm_up_status: Dict[str, str] = {}
 
         if status_forcelist is None:
             status_forcelist = [500, 502, 503, 504]
@@ -32,12 +389,372 @@ class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
     def _connect(self, **kwargs: Any) -> requests.Session:
         """Connects to the Session
 
+        The NASA API and the Exoplanet Archive get connection pools of their
+        own, so a slow table download cannot starve API requests of
+        connections. Other hosts, e.g. image servers, share a default pool.
+
         :returns: requests.Session
         """
         session = requests.Session()
-        session.mount("https://", HTTPAdapter(max_retries=self.retries))
+
+        def _adapter(maxsize: int) -> PooledHTTPAdapter:
+            return PooledHTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=maxsize, pool_block=self.pool_block,
+                                     keep_alive=self.keep_alive, max_retries=self.retries)
+
+        default = _adapter(self.pool_maxsize)
+        session.mount("https://", default)
+        session.mount("http://", default)
+
+        hosts = {_origin(self.base_url): self.pool_maxsize, _origin(self.exoplanet_url): self.pool_maxsize}
+        hosts.update(self.host_pool_maxsize)
+        for prefix, maxsize in hosts.items():
+            session.mount(prefix, _adapter(maxsize))
         return session
 
+    @property
+    def _session(self) -> requests.Session:
+        """Returns the session requests are sent over.
+
+        With thread_local_sessions, every thread gets a session of its own so
+        cookies and headers are never mutated concurrently. The sessions share
+        the adapters of the connection's session, and so its connection pools.
+        """
+        session = self._instance
+        if not self.thread_local_sessions:
+            return session
+
+        cached = getattr(self._local, 'session', None)
+        if cached is None or cached[0] is not session:
+            thread_session = requests.Session()
+            for prefix, adapter in session.adapters.items():
+                thread_session.mount(prefix, adapter)
+            cached = (session, thread_session)
+            self._local.session = cached
+        return cached[1]
+
+    def pool_stats(self) -> pd.DataFrame:
+        """Returns the utilization of the connection pools, one row per host.
+
+        'in_use' counts checked out connections and 'discarded' connections
+        closed because their pool was full; a growing 'discarded' count means
+        pool_maxsize is too small for the number of concurrent users.
+        """
+        adapters = {id(adapter): adapter for adapter in self._instance.adapters.values()}
+        rows = [row for adapter in adapters.values() for row in adapter.pool_stats()]
+        return pd.DataFrame(rows, columns=['host', 'maxsize', 'in_use', 'idle', 'opened', 'requests', 'discarded'])
+
+    def _get(self, url: str, params: Optional[dict] = None, priority: int = PRIORITY_NORMAL, **kwargs: Any) -> requests.Response:
+        """Sends a GET request over the session, through the persistent response cache if one is configured.
+
+        Requests go through the scheduler: those to base_url are counted against
+        the API key's rate limit, and identical requests already in flight are
+        coalesced into one. Streamed requests are never coalesced, since their
+        body can only be read once.
+
+        Each endpoint has a circuit breaker: once it keeps failing, requests to
+        it fail fast with CircuitOpenError until a probe request succeeds.
+
+        :param url: endpoint URL
+        :param params: query parameters
+        :param priority: scheduling priority (PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW)
+        :param kwargs: other arguments passed to requests.Session.get
+        :returns: requests.Response
+        :raises NASAAPIError: if the request fails or the endpoint answers with an error status
+        """
+
+        endpoint = self._endpoint_name(url)
+        breaker = self.circuit_breaker(endpoint)
+        breaker.before_request()
+
+        rate_limited = url.startswith(self.base_url)
+
+        def _network_get(url: str, **kwargs: Any) -> requests.Response:
+            # Only requests that reach the network take a token, and only their headers update the bucket
+            start = time.perf_counter()
+            try:
+                response = self.scheduler.send(lambda: self._session.get(url, **kwargs), priority=priority, rate_limited=rate_limited)
+            except requests.RequestException:
+                breaker.record_failure()
+                raise
+
+            # Recorded here so that revalidations answered with 304 count as requests too.
+            # Bytes are those read off the wire, before any Content-Encoding is decoded;
+            # a streamed body has not been read yet, so its Content-Length stands in
+            self.stats.observe(endpoint, 'network', time.perf_counter() - start)
+            retries = response.raw.retries.history if getattr(response.raw, 'retries', None) else ()
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length', 0))
+            else:
+                size = response.raw.tell()
+            self.stats.record_request(endpoint, num_bytes=size, retries=len(retries))
+
+            # The outcome is recorded once per network request, not once per coalesced caller.
+            # Server errors count against the endpoint, client errors do not
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
+
+        def _send() -> requests.Response:
+            if self.response_cache is None:
+                return _network_get(url, params=params, **kwargs)
+            return self.response_cache.fetch(_network_get, url, params=params, **kwargs)
+
+        key = None if kwargs.get('stream') else make_cache_key(url, params)
+        try:
+            response = self.scheduler.run(key, _send)
+        except requests.RequestException as e:
+            raise EndpointUnavailable(f"{endpoint} is unavailable: {e}", endpoint) from e
+        finally:
+            # Lets the next probe through if this one was shed, served from the cache,
+            # coalesced into another request or interrupted before recording an outcome
+            breaker.release()
+
+        if response.status_code == 429:
+            raise RateLimitExceeded(f"{endpoint} rejected the request, the rate limit is exhausted", endpoint)
+        if response.status_code >= 400:
+            raise HTTPStatusError(f"{endpoint} answered {response.status_code} {response.reason}", endpoint, status_code=response.status_code)
+        return response
+
+    def circuit_breaker(self, endpoint: str) -> CircuitBreaker:
+        """Returns the circuit breaker of an endpoint, creating it on first use."""
+        with self._breakers_lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(endpoint, failure_threshold=self.failure_threshold, reset_timeout=self.reset_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+
+    def circuit_states(self) -> Dict[str, str]:
+        """Returns the circuit breaker state ('closed', 'open' or 'half_open') of every endpoint used so far."""
+        with self._breakers_lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.state for endpoint, breaker in breakers.items()}
+
+    def _call_cached(self, query: Callable[..., Any], cache_time: int, *args: Any, **kwargs: Any) -> Any:
+        """Calls a cached query function, through the stale-while-revalidate cache if one is configured.
+
+        Expired results are then returned straight away while a background
+        worker recomputes them. The refresh runs once the cache_data entry has
+        expired too, so it goes to the network instead of reading the old result.
+
+        Errors are never stored by cache_data. They go to the error cache for
+        error_cache_time seconds instead, so a failing query is not repeated
+        on every rerun.
+
+        With a result_store, results are kept there instead of in cache_data
+        and every caller gets a read-only view of the stored copy.
+        """
+        key = repr((query.__qualname__, args, sorted(kwargs.items())))
+        ctx = get_script_run_ctx(suppress_warning=True)
+        caller = threading.current_thread()
+
+        def _compute() -> Any:
+            error = self.error_cache.get(key)
+            if error is not None:
+                raise error.with_traceback(None)
+
+            # Refreshes run on worker threads, which need the script context for cache_data
+            if ctx is not None and threading.current_thread() is not caller:
+                add_script_run_ctx(ctx=ctx)
+            try:
+                if self.result_store is None or self._is_unstored(key):
+                    return query(*args, **kwargs)
+                return self._call_stored(query, key, cache_time, *args, **kwargs)
+            except (CircuitOpenError, RateLimitExceeded):
+                # Local conditions, not answers from the endpoint
+                raise
+            except NASAAPIError as e:
+                self.error_cache.set(key, e)
+                raise
+
+        if self.swr_cache is None:
+            return _compute()
+        return self.swr_cache.get(key, cache_time, _compute)
+
+    def _call_stored(self, query: Callable[..., Any], key: str, cache_time: int, *args: Any, **kwargs: Any) -> Any:
+        """Serves a cached query function from the result store, computing and storing its result on a miss."""
+        # Connections to other hosts may share the store
+        store_key = repr((self.base_url, self.exoplanet_url, key))
+        result = self.result_store.get(store_key, ttl=cache_time)
+        if result is not None:
+            return result
+
+        # The function without cache_data, which would keep a pickled copy as well
+        result = query.__wrapped__(*args, **kwargs)
+        stored = self.result_store.put(store_key, result) if isinstance(result, pd.DataFrame) else None
+        if stored is None:
+            with self._unstored_lock:
+                self._unstored[key] = None
+                while len(self._unstored) > UNSTORED_MAX_ENTRIES:
+                    self._unstored.popitem(last=False)
+            return result
+        return stored
+
+    def _is_unstored(self, key: str) -> bool:
+        """Tells whether a query's result was found not to fit the result store, marking it as recently used."""
+        with self._unstored_lock:
+            if key not in self._unstored:
+                return False
+            self._unstored.move_to_end(key)
+            return True
+
+    def _endpoint_name(self, url: str) -> str:
+        """Returns the name an endpoint URL is reported under in the stats."""
+        if url.startswith(self.base_url):
+            path = url[len(self.base_url):]
+            for prefix, name in ENDPOINT_NAMES:
+                if path.startswith(prefix):
+                    return name
+            return path.split('?')[0]
+        if url.startswith(self.exoplanet_url):
+            return 'exoplanet'
+        return urlparse(url).netloc
+
+    def fetch_images(self, urls: Iterable[str], thumbnail: bool = True, max_workers: int = 8) -> List[str]:
+        """Downloads images concurrently into the image cache and returns their local paths.
+
+        Without an image_cache, or for images that fail to download, the remote
+        URLs are returned unchanged so callers can always pass the result to st.image.
+
+        :param urls: remote image URLs (e.g. 'img_src' of rover photos or 'url' of APODs)
+        :param thumbnail: return downscaled thumbnails instead of the originals
+        :param max_workers: number of images downloaded at the same time
+        :returns: list of local paths or URLs, in the order of urls
+        """
+        urls = list(urls)
+        if self.image_cache is None:
+            return urls
+
+        paths = self.image_cache.prefetch(self._session, urls, thumbnail=thumbnail, max_workers=max_workers)
+        return [path or url for path, url in zip(paths, urls)]
+
+    def warm_up(self, queries: Iterable[Tuple[str, tuple, Dict[str, Any]]], max_workers: int = 2) -> threading.Thread:
+        """Runs queries on a background thread so their results are cached before a page asks for them.
+
+        Each query is a query method name with its positional and keyword
+        arguments, e.g. ('query_apod', ('latest',), {}). Pass them as the page
+        does, so the page's call finds the cached result. A page asking while
+        its query is still warming up waits for the same request instead of
+        sending another one, as identical requests in flight are shared.
+
+        :param queries: (method name, args, kwargs) of the queries to run
+        :param max_workers: number of queries run at the same time
+        :returns: the started warm-up thread; see warm_up_status for the outcome of every query
+        """
+        queries = list(queries)
+        for name, args, kwargs in queries:
+            self.warm_up_status[_describe_call(name, args, kwargs)] = 'pending'
+
+        def _run(query: Tuple[str, tuple, Dict[str, Any]]) -> None:
+            name, args, kwargs = query
+            call = _describe_call(name, args, kwargs)
+            start = time.perf_counter()
+            try:
+                self._call_query(name, *args, **kwargs)
+                self.warm_up_status[call] = f'done in {time.perf_counter() - start:.2f}s'
+            except Exception as e:
+                self.warm_up_status[call] = f'failed: {e}'
+
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def _warm_up() -> None:
+            if ctx is not None:
+                add_script_run_ctx(ctx=ctx)
+            _map_concurrent(_run, queries, max_workers)
+
+        thread = threading.Thread(target=_warm_up, name='nasa-warm-up', daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _query_method(name: str) -> Callable[..., Any]:
+        """Returns a query method by name; the blocking version, also on AsyncNASA_APIConnection."""
+        method = getattr(NASA_APIConnection, name, None)
+        if not name.startswith('query_') or name == 'query_many' or not callable(method):
+            raise ValueError(f"{name} is not a query method of NASA_APIConnection")
+        return method
+
+    def _call_query(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        return self._query_method(name)(self, *args, **kwargs)
+
+    def _normalize_spec(self, spec: QuerySpec) -> QuerySpec:
+        """Binds a spec's arguments to its method's parameters, so calls spelled differently compare equal."""
+        try:
+            bound = inspect.signature(self._query_method(spec.method)).bind(self, *spec.args, **dict(spec.kwargs))
+        except TypeError as e:
+            raise ValueError(f"{spec}: {e}") from None
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments['self']
+        arguments.update(arguments.pop('kwargs', {}))
+        return QuerySpec(spec.method, (), tuple(sorted(arguments.items())))
+
+    def query_many(self, specs: Iterable[QuerySpec], max_workers_per_host: int = 4, host_limits: Optional[Dict[str, int]] = None) -> Generator[QueryResult, None, None]:
+        """Runs a batch of queries concurrently and yields their results as they complete.
+
+        Specs that describe the same call, however their arguments are spelled,
+        are run once. Every host has its own workers, so a batch takes about as
+        long as its slowest host instead of the sum of its queries; queries
+        already in cache_data return as soon as a worker of their host picks
+        them up. Failed queries are yielded with their error instead of
+        stopping the batch.
+
+        Queries that fan out themselves (those with a max_workers argument,
+        e.g. query_neows_range) run their requests one at a time here, so the
+        per-host limits bound the requests in flight, not just the queries.
+
+        Closing the generator early cancels the queries that have not started.
+
+        :param specs: queries to run, e.g. [QuerySpec.of('query_apod', '2023-07-01'), ...]
+        :param max_workers_per_host: number of queries sent to a host at the same time
+        :param host_limits: number of queries sent at the same time to particular hosts,
+                            keyed by scheme and host (e.g. {'https://exoplanetarchive.ipac.caltech.edu/': 2})
+        :returns: generator of QueryResult, one per distinct spec, in order of completion
+        :raises ValueError: if a spec does not name a query method or its arguments do not fit it
+        """
+        specs = list(dict.fromkeys(specs))
+        calls: Dict[QuerySpec, List[QuerySpec]] = {}
+        for spec in specs:
+            calls.setdefault(self._normalize_spec(spec), []).append(spec)
+
+        limits = dict(host_limits or {})
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def _init_worker():
+            if ctx is not None:
+                add_script_run_ctx(ctx=ctx)
+
+        executors: Dict[str, ThreadPoolExecutor] = {}
+        futures = {}
+        try:
+            for call in calls:
+                # Exoplanet Archive queries are the only ones not sent to base_url
+                host = _origin(self.exoplanet_url if call.method == 'query_exoplanet_data' else self.base_url)
+                if host not in executors:
+                    executors[host] = ThreadPoolExecutor(max_workers=limits.get(host, max_workers_per_host),
+                                                         thread_name_prefix='nasa-query-many', initializer=_init_worker)
+                kwargs = dict(call.kwargs)
+                if 'max_workers' in kwargs:
+                    kwargs['max_workers'] = 1
+                futures[executors[host].submit(self._call_query, call.method, **kwargs)] = call
+
+            for future in as_completed(futures):
+                call = futures[future]
+                try:
+                    data, error = future.result(), None
+                except Exception as e:
+                    # e.g. NASAAPIError, or ValueError from a local query such as query_apod_archive
+                    data, error = None, e
+                for spec in calls[call]:
+                    yield QueryResult(spec, data, error)
+        finally:
+            for future in futures:
+                future.cancel()
+            for executor in executors.values():
+                executor.shutdown(wait=False)
+
     def query_apod(self, date: str, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
         """Queries the Astronomy Picture Of The Day API and returns a DataFrame.
 
@@ -45,10 +762,12 @@ class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
         :param cache_time: time to cache the result
         :param kwargs: other optional parameters
         :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
         """
 
         @cache_data(ttl=cache_time)
         def _query_apod(date: str, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('apod')
             params = {'api_key': self.api_key, **kwargs}
             
             if date.lower() == 'latest':
@@ -58,123 +777,400 @@ class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
                 params = {'date': date, 'api_key': self.api_key, **kwargs}
 
             try:
-                response = self._instance.get(url, params=params)
+                response = self._get(url, params=params)
                 response.raise_for_status()
-                data = response.json()
+                with self.stats.timer('apod', 'decode'):
+                    data = loads(response.content)
 
-                # Create a DataFrame from the JSON response
-                result = pd.DataFrame(data, index=[0])
+                # Create a DataFrame from the JSON response, 'count' queries return a list
+                with self.stats.timer('apod', 'build'):
+                    result = pd.DataFrame(data) if isinstance(data, list) else pd.DataFrame(data, index=[0])
 
                 return result
             except Exception as e:
-                print(f"An error occurred: {e}")
-                return None
+                self.stats.record_error('apod')
+                raise _as_api_error('apod', e)
+
+        self.stats.record_call('apod')
+        return self._call_cached(_query_apod, cache_time, date, **kwargs)
+
+
+    def _query_apod_window(self, start_date: str, end_date: str, priority: int = PRIORITY_NORMAL, **kwargs: Any) -> Tuple[pd.DataFrame, Optional[int]]:
+        """Fetches the APODs of a date range in one request.
+
+        :returns: result as a DataFrame and the remaining rate limit reported by the API
+        """
+        params = {'start_date': start_date, 'end_date': end_date, 'api_key': self.api_key, **kwargs}
+
+        url = self.base_url + 'planetary/apod'
+
+        response = self._get(url, params=params, priority=priority)
+        response.raise_for_status()
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        with self.stats.timer('apod', 'decode'):
+            data = loads(response.content)
+        with self.stats.timer('apod', 'build'):
+            result = pd.DataFrame(data)
+        return result, int(remaining) if remaining is not None else None
+
+    def query_apod_range(self, start_date: str, end_date: str, max_workers: int = 2, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        """Queries the Astronomy Picture Of The Day API for a date range and returns a DataFrame.
+
+        The range is fetched in month-sized start_date/end_date requests which run
+        concurrently and are cached individually, so overlapping ranges reuse them.
+
+        :param start_date: start date in the format 'YYYY-MM-DD'
+        :param end_date: end date in the format 'YYYY-MM-DD'
+        :param max_workers: number of months fetched at the same time
+        :param cache_time: time to cache each month
+        :param kwargs: other optional parameters
+        :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
+        :raises ValueError: if a date is malformed or end_date is before start_date
+        """
 
-        return _query_apod(date, **kwargs)
+        @cache_data(ttl=cache_time, show_spinner=False)
+        def _query_apod_month(start_date: str, end_date: str, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('apod')
+            return self._query_apod_window(start_date, end_date, **kwargs)[0]
 
+        # Request whole months so that chunks are shared between overlapping ranges
+        months = [(max(month_start[:8] + '01', APOD_FIRST_DATE), month_end)
+                  for month_start, month_end in _month_chunks(start_date, end_date)]
+        self.stats.record_call('apod', len(months))
 
-    def query_neows(self, start_date: str, end_date: str, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        try:
+            frames = _map_concurrent(lambda month: self._call_cached(_query_apod_month, cache_time, *month, **kwargs), months, max_workers)
+            result = pd.concat(frames, ignore_index=True)
+            if result.empty:
+                return result
+
+            result = result[result['date'].between(start_date, end_date)]
+            return result.drop_duplicates(subset='date').sort_values('date').reset_index(drop=True)
+        except Exception as e:
+            self.stats.record_error('apod')
+            raise _as_api_error('apod', e)
+
+    def backfill_apod(self, start_date: str = APOD_FIRST_DATE, end_date: str = None, max_workers: int = 2, min_remaining: int = 50, **kwargs: Any) -> BackfillResult:
+        """Downloads the APOD archive into the local APOD archive, one month per request.
+
+        Months fetched before are skipped and every month is written as soon as
+        it arrives, so an interrupted backfill resumes where it stopped. The
+        backfill stops early when the API key's remaining hourly quota drops
+        below min_remaining, or when its low priority requests are shed.
+
+        :param start_date: start date in the format 'YYYY-MM-DD' (default: first APOD)
+        :param end_date: end date in the format 'YYYY-MM-DD' (default: current date)
+        :param max_workers: number of months fetched at the same time
+        :param min_remaining: rate limit quota to leave for other queries
+        :param kwargs: other optional parameters
+        :returns: number of entries written to the archive, number of months left and, if the
+                  backfill stopped early, the reason why
+        :raises NASAAPIError: if a month fails to download; the months fetched so far are kept
+        """
+        if self.apod_archive is None:
+            raise ValueError("backfill_apod requires an apod_archive")
+
+        if end_date is None:
+            end_date = date_type.today().isoformat()
+
+        missing = [month for month in _month_chunks(max(start_date, APOD_FIRST_DATE), end_date)
+                   if not self.apod_archive.is_fetched(*month)]
+
+        def _fetch(month: Tuple[str, str]) -> Any:
+            try:
+                return self._query_apod_window(*month, priority=PRIORITY_LOW, **kwargs)
+            except Exception as e:
+                return _as_api_error('apod', e)
+
+        written = 0
+        months_left = len(missing)
+        stopped = None
+        for i in range(0, len(missing), max_workers):
+            batch = missing[i:i + max_workers]
+            results = _map_concurrent(_fetch, batch, max_workers)
+
+            # Keep the months that arrived before raising the error of another
+            for month, result in zip(batch, results):
+                if not isinstance(result, NASAAPIError):
+                    written += self.apod_archive.write(result[0])
+                    self.apod_archive.mark_fetched(*month)
+                    months_left -= 1
+
+            errors = [result for result in results if isinstance(result, NASAAPIError)]
+            failures = [error for error in errors if not isinstance(error, RateLimitExceeded)]
+            if failures:
+                raise failures[0]
+            if errors:
+                stopped = str(errors[0])
+                break
+
+            remaining = [result[1] for result in results if result[1] is not None]
+            if remaining and min(remaining) < min_remaining:
+                stopped = f"{min(remaining)} requests left in the rate limit"
+                break
+
+        if stopped is not None:
+            logger.info("Stopping APOD backfill with %d months left: %s", months_left, stopped)
+        return BackfillResult(written, months_left, stopped)
+
+    def query_apod_archive(self, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Returns APODs from the local APOD archive, without network I/O.
+
+        :param start_date: start date in the format 'YYYY-MM-DD' (optional)
+        :param end_date: end date in the format 'YYYY-MM-DD' (optional)
+        :returns: result as a DataFrame
+        """
+        if self.apod_archive is None:
+            raise ValueError("query_apod_archive requires an apod_archive")
+        return self.apod_archive.query(start_date, end_date)
+
+    def query_neows(self, start_date: str, end_date: str, cache_time: int = 3600, *, long_format: bool = False, **kwargs: Any) -> pd.DataFrame:
         """Queries the Near-Earth Object Web Service (NEOWS) API and returns a DataFrame.
 
         :param start_date: start date in the format 'YYYY-MM-DD'
         :param end_date: end date in the format 'YYYY-MM-DD'
         :param cache_time: time to cache the result
+        :param long_format: return one row per close approach instead of one row per object
         :param kwargs: other optional parameters
         :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
         """
 
         @cache_data(ttl=cache_time)
-        def _query_neows(start_date: str, end_date: str, **kwargs: Any) -> pd.DataFrame:
+        def _query_neows(start_date: str, end_date: str, long_format: bool, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('neows')
             params = {'start_date': start_date, 'end_date': end_date, 'api_key': self.api_key, **kwargs}
 
             url = self.base_url + 'neo/rest/v1/feed'
 
             try:
-                response = self._instance.get(url, params=params)
+                response = self._get(url, params=params)
                 response.raise_for_status()
-                data = response.json()
+                with self.stats.timer('neows', 'decode'):
+                    data = loads(response.content)
 
                 # Flatten the nested JSON response to create a DataFrame
-                neows_data = data['near_earth_objects']
-                neows_list = []
-                for date in data['near_earth_objects']:
-                    for obj in data['near_earth_objects'][date]:
-                        obj_data = {
-                            'id': obj['id'],
-                            'name': obj['name'],
-                            'neo_reference_id': obj['neo_reference_id'],
-                            'close_approach_date': obj['close_approach_data'][0]['close_approach_date'],
-                            'nasa_jpl_url': obj['nasa_jpl_url'],
-                            'absolute_magnitude_h': obj['absolute_magnitude_h'],
-                            'estimated_diameter_min_km': obj['estimated_diameter']['kilometers']['estimated_diameter_min'],
-                            'estimated_diameter_max_km': obj['estimated_diameter']['kilometers']['estimated_diameter_max'],
-                            'estimated_diameter_min_m': obj['estimated_diameter']['meters']['estimated_diameter_min'],
-                            'estimated_diameter_max_m': obj['estimated_diameter']['meters']['estimated_diameter_max'],
-                            'is_potentially_hazardous_asteroid': obj['is_potentially_hazardous_asteroid'],
-                            'relative_velocity_kms': obj['close_approach_data'][0]['relative_velocity']['kilometers_per_second'],
-                            'miss_distance_km': obj['close_approach_data'][0]['miss_distance']['kilometers'],
-                            'orbiting_body': obj['close_approach_data'][0]['orbiting_body']
-                        }
-
-                        neows_list.append(obj_data)
-
-                result = pd.DataFrame(neows_list)
+                with self.stats.timer('neows', 'build'):
+                    result = _normalize_neows(data, long_format=long_format)
 
                 return result
             except Exception as e:
-                print(f"An error occurred: {e}")
-                return None
+                self.stats.record_error('neows')
+                raise _as_api_error('neows', e)
+
+        self.stats.record_call('neows')
+        return self._call_cached(_query_neows, cache_time, start_date, end_date, long_format, **kwargs)
+
+    def query_neows_range(self, start_date: str, end_date: str, long_format: bool = False, max_workers: int = 4, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        """Queries the NEOWS API for an arbitrary date range and returns a DataFrame.
+
+        The range is split into 7-day windows which are fetched concurrently and
+        cached individually, so overlapping ranges reuse already fetched windows.
+
+        :param start_date: start date in the format 'YYYY-MM-DD'
+        :param end_date: end date in the format 'YYYY-MM-DD'
+        :param long_format: return one row per close approach instead of one row per object
+        :param max_workers: number of windows fetched at the same time
+        :param cache_time: time to cache each window
+        :param kwargs: other optional parameters
+        :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
+        :raises ValueError: if a date is malformed or end_date is before start_date
+        """
+
+        @cache_data(ttl=cache_time, show_spinner=False)
+        def _query_neows_window(start_date: str, end_date: str, long_format: bool, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('neows')
+            params = {'start_date': start_date, 'end_date': end_date, 'api_key': self.api_key, **kwargs}
+
+            url = self.base_url + 'neo/rest/v1/feed'
+
+            response = self._get(url, params=params)
+            response.raise_for_status()
+            with self.stats.timer('neows', 'decode'):
+                data = loads(response.content)
+            with self.stats.timer('neows', 'build'):
+                return _normalize_neows(data, long_format=long_format)
+
+        windows = _neows_windows(start_date, end_date)
+        self.stats.record_call('neows', len(windows))
 
-        return _query_neows(start_date, end_date, **kwargs)
+        try:
+            frames = _map_concurrent(lambda window: self._call_cached(_query_neows_window, cache_time, *window, long_format, **kwargs), windows, max_workers)
+            result = pd.concat(frames, ignore_index=True)
+            if result.empty:
+                return result
+
+            # Windows are aligned to whole weeks, trim them back to the requested range
+            in_range = result['close_approach_date'].between(start_date, end_date)
+            result = result[in_range].drop_duplicates(subset=['id', 'close_approach_date'])
+
+            return result.sort_values(['close_approach_date', 'id']).reset_index(drop=True)
+        except Exception as e:
+            self.stats.record_error('neows')
+            raise _as_api_error('neows', e)
+
+
+    def _query_mars_rover_page(self, rover_name: str, sol: Any, page: int, camera: str = None, **kwargs: Any) -> list:
+        """Fetches one page of Mars Rover photos and returns the list of photos."""
+        params = {'sol': sol, 'page': page, 'camera': camera, 'api_key': self.api_key, **kwargs}
 
+        url = self.base_url + f'mars-photos/api/v1/rovers/{rover_name}/photos'
 
-    def query_mars_rover_photos(self, rover_name: str, sol: str, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        response = self._get(url, params=params)
+        response.raise_for_status()
+        with self.stats.timer('mars_rover_photos', 'decode'):
+            return loads(response.content).get('photos', [])
+
+    def query_mars_rover_photos(self, rover_name: str, sol: str, cache_time: int = 3600, *, limit: int = 100, max_workers: int = MARS_ROVER_MAX_PREFETCH, **kwargs: Any) -> pd.DataFrame:
         """Queries the Mars Rover Photos API and returns a DataFrame containing photos for the specified rover and sol.
 
         :param rover_name: name of the rover (Curiosity, Opportunity, or Spirit)
         :param sol: Martian sol (a Martian day) to get photos for
         :param cache_time: time to cache the result
+        :param limit: maximum number of photos to return
+        :param max_workers: number of pages fetched at the same time once the first page comes back full
         :param kwargs: other optional parameters
         :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
         """
 
         @cache_data(ttl=cache_time)
-        def _query_mars_rover_photos(rover_name: str, sol: str, **kwargs: Any) -> pd.DataFrame:
-            params = {'sol': sol, 'api_key': self.api_key, **kwargs}
-
-            url = self.base_url + f'mars-photos/api/v1/rovers/{rover_name}/photos'
-
+        def _query_mars_rover_photos(rover_name: str, sol: str, limit: int, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('mars_rover_photos')
             try:
-                response = self._instance.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-
-                # Extract photos from the JSON response
-                photos = data.get('photos', [])
+                # Only fetch as many pages as needed for the first `limit` photos
+                pages = -(-limit // MARS_ROVER_PAGE_SIZE)
+                prefetch = min(pages, max_workers)
+                batches = []
+                count = 0
+                for batch in self.iter_mars_rover_photos(rover_name, sol, prefetch=prefetch, max_pages=pages, **kwargs):
+                    batches.append(batch)
+                    count += len(batch)
+                    if count >= limit:
+                        break
 
                 # Create a DataFrame from the list of photos
-                result = pd.DataFrame(photos[0:100])
+                if not batches:
+                    return pd.DataFrame()
+                result = pd.concat(batches, ignore_index=True).iloc[:limit]
 
                 return result
             except Exception as e:
-                print(f"An error occurred: {e}")
-                return None
+                self.stats.record_error('mars_rover_photos')
+                raise _as_api_error('mars_rover_photos', e)
+
+        self.stats.record_call('mars_rover_photos')
+        return self._call_cached(_query_mars_rover_photos, cache_time, rover_name, sol, limit, **kwargs)
+
+    def iter_mars_rover_photos(self, rover_name: str, sol: str, camera: str = None, prefetch: int = 2, max_pages: Optional[int] = None, **kwargs: Any) -> Generator[pd.DataFrame, None, None]:
+        """Lazily iterates over the photos of a rover and sol, one DataFrame per page.
+
+        Pages are requested through the endpoint's 'page' parameter. Page 1 is
+        fetched on its own, since most sols fit on it; only once it comes back
+        full are up to `prefetch` pages fetched ahead of the consumer, so memory
+        stays flat however many photos the sol has.
+
+        :param rover_name: name of the rover (Curiosity, Opportunity, or Spirit)
+        :param sol: Martian sol (a Martian day) to get photos for
+        :param camera: only return photos taken by this camera (e.g. 'NAVCAM') (optional)
+        :param prefetch: maximum number of pages fetched ahead
+        :param max_pages: stop after this many pages (optional)
+        :param kwargs: other optional parameters
+        :returns: generator of DataFrames with up to 25 photos each
+        """
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+        pending = deque()
+        next_page = 1
+        window = 1
+
+        try:
+            while True:
+                while len(pending) < window and (max_pages is None or next_page <= max_pages):
+                    pending.append(executor.submit(self._query_mars_rover_page, rover_name, sol, next_page, camera, **kwargs))
+                    next_page += 1
+                if not pending:
+                    return
 
-        return _query_mars_rover_photos(rover_name, sol, **kwargs)
+                photos = pending.popleft().result()
+                if photos:
+                    with self.stats.timer('mars_rover_photos', 'build'):
+                        batch = pd.DataFrame(photos)
+                    yield batch
+                if len(photos) < MARS_ROVER_PAGE_SIZE:
+                    return
+                window = max(prefetch, 1)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
 
-    def query_donki(self, start_date: str = None, end_date: str = None, type: str = "all", cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+    def iter_mars_rover_photos_bulk(self, rover_name: str, sols: Iterable[Any], camera: str = None, max_workers: int = 4, **kwargs: Any) -> Generator[pd.DataFrame, None, None]:
+        """Iterates over the photos of many sols, fetching pages of different sols concurrently.
+
+        Batches are yielded as their pages arrive, so they are not ordered by sol
+        or page; use the 'sol' column to tell them apart. At most `max_workers`
+        pages are in flight at any time.
+
+        :param rover_name: name of the rover (Curiosity, Opportunity, or Spirit)
+        :param sols: Martian sols to get photos for (e.g. range(1000, 1100))
+        :param camera: only return photos taken by this camera (e.g. 'NAVCAM') (optional)
+        :param max_workers: maximum number of pages fetched at the same time
+        :param kwargs: other optional parameters
+        :returns: generator of DataFrames with up to 25 photos each
+        """
+        sols = iter(sols)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        in_flight = {}
+
+        def _submit(sol, page):
+            future = executor.submit(self._query_mars_rover_page, rover_name, sol, page, camera, **kwargs)
+            in_flight[future] = (sol, page)
+
+        try:
+            for sol in itertools.islice(sols, max_workers):
+                _submit(sol, 1)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sol, page = in_flight.pop(future)
+                    photos = future.result()
+
+                    # A full page means there may be more; otherwise move on to the next sol
+                    if len(photos) == MARS_ROVER_PAGE_SIZE:
+                        _submit(sol, page + 1)
+                    else:
+                        for next_sol in itertools.islice(sols, 1):
+                            _submit(next_sol, 1)
+
+                    if photos:
+                        with self.stats.timer('mars_rover_photos', 'build'):
+                            batch = pd.DataFrame(photos)
+                        yield batch
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def query_donki(self, start_date: str = None, end_date: str = None, type: str = "all", cache_time: int = 3600, *, stream: bool = False, **kwargs: Any) -> pd.DataFrame:
         """Queries the NASA DONKI API and returns a DataFrame containing space weather events.
 
         :param start_date: start date in the format 'YYYY-MM-DD' (default: 30 days prior to current UTC date)
         :param end_date: end date in the format 'YYYY-MM-DD' (default: current UTC date)
         :param type: type of event (default is 'all')
         :param cache_time: time to cache the result
+        :param stream: decode the body while it downloads, which pays off for multi-month
+                       ranges over slow links; streamed requests bypass the response cache
         :param kwargs: other optional parameters
         :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
         """
 
         @cache_data(ttl=cache_time)
-        def _query_donki(start_date: str, end_date: str, type: str, **kwargs: Any) -> pd.DataFrame:
+        def _query_donki(start_date: str, end_date: str, type: str, stream: bool, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('donki')
             params = {
                 'startDate': start_date,
                 'endDate': end_date,
@@ -185,23 +1181,172 @@ class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
             url = self.base_url + f'DONKI/{type}'
 
             try:
-                response = self._instance.get(url, params=params)
+                response = self._get(url, params=params, stream=stream)
                 response.raise_for_status()
-                data = response.json()
-                
-                # Create a DataFrame from the JSON response
-                try:
-                    result = pd.DataFrame(data)
-                except:
-                    result = data
+                with self.stats.timer('donki', 'decode'):
+                    # DONKI answers with an empty body when there are no events
+                    result = _read_json_records(response)
 
                 return result
             except Exception as e:
-                print(f"An error occurred: {e}")
-                return None
+                self.stats.record_error('donki')
+                raise _as_api_error('donki', e)
+
+        self.stats.record_call('donki')
+        return self._call_cached(_query_donki, cache_time, start_date, end_date, type, stream, **kwargs)
+
+    def query_donki_all(self, start_date: str = None, end_date: str = None, types: Iterable[str] = DONKI_ALL_TYPES, max_workers: int = 8, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        """Queries several DONKI event types concurrently and returns them as one event table.
+
+        Each type's ID and time fields become the common event_id and event_time
+        columns; see donki_events.normalize_donki_events. Build a
+        donki_events.DonkiLinkIndex over the result to look up linked events.
+
+        Each type is cached on its own, so a type that fails goes to the error
+        cache without discarding the others. Failed types are left out of the
+        table and listed in result.attrs['failed_types'], mapping each type to
+        its error message; if every type fails, the first error is raised.
+
+        :param start_date: start date in the format 'YYYY-MM-DD' (default: 30 days prior to current UTC date)
+        :param end_date: end date in the format 'YYYY-MM-DD' (default: current UTC date)
+        :param types: event types to query (default: CME, GST, FLR, SEP, MPC, RBE, HSS and notifications)
+        :param max_workers: number of event types downloaded at the same time
+        :param cache_time: time to cache the result
+        :param kwargs: other optional parameters
+        :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
+        """
+
+        @cache_data(ttl=cache_time)
+        def _query_donki_events(start_date: str, end_date: str, type: str, **kwargs: Any) -> List[Dict[str, Any]]:
+            self.stats.record_cache_miss('donki')
+            params = {
+                'startDate': start_date,
+                'endDate': end_date,
+                'api_key': self.api_key,
+                **kwargs
+            }
+
+            try:
+                response = self._get(self.base_url + f'DONKI/{type}', params=params)
+                response.raise_for_status()
+                with self.stats.timer('donki', 'decode'):
+                    # DONKI answers with an empty body when there are no events
+                    return loads(response.content) if response.content.strip() else []
+            except Exception as e:
+                self.stats.record_error('donki')
+                raise _as_api_error('donki', e)
+
+        def _fetch(type: str) -> Any:
+            try:
+                return self._call_cached(_query_donki_events, cache_time, start_date, end_date, type, **kwargs)
+            except NASAAPIError as e:
+                return e
+
+        types = list(dict.fromkeys(types))
+        self.stats.record_call('donki', len(types))
+        results = dict(zip(types, _map_concurrent(_fetch, types, max_workers)))
+        errors = {type: result for type, result in results.items() if isinstance(result, NASAAPIError)}
+        if errors and len(errors) == len(results):
+            raise next(iter(errors.values()))
+
+        with self.stats.timer('donki', 'build'):
+            result = normalize_donki_events({type: data for type, data in results.items() if type not in errors})
+        result.attrs['failed_types'] = {type: str(error) for type, error in errors.items()}
+        return result
+
+    def sync_donki(self, type: str, start_date: str = None, end_date: str = None, overlap_days: int = 7, initial_days: int = 30, chunk_days: int = 30, max_workers: int = 4) -> int:
+        """Syncs DONKI events of one type into the local event store.
+
+        Only the window since the last sync watermark is fetched, extended back by
+        overlap_days so that events revised since the last sync are updated too.
+
+        :param type: type of event (e.g. 'CME')
+        :param start_date: start date in the format 'YYYY-MM-DD' (default: watermark minus overlap_days, or initial_days prior to end_date on the first sync)
+        :param end_date: end date in the format 'YYYY-MM-DD' (default: current UTC date)
+        :param overlap_days: days before the watermark that are fetched again
+        :param initial_days: days fetched on the first sync of an event type
+        :param chunk_days: length of the windows fetched concurrently
+        :param max_workers: number of windows fetched at the same time
+        :returns: number of events written to the store
+        :raises NASAAPIError: if the sync fails (see api_errors)
+        :raises ValueError: if a date is malformed or end_date is before start_date
+        """
+        if self.donki_store is None:
+            raise ValueError("sync_donki requires a donki_store")
+        donki_event_fields(type)
+
+        if end_date is None:
+            end_date = datetime.utcnow().date().isoformat()
+        if start_date is None:
+            watermark = self.donki_store.watermark(type)
+            if watermark is not None:
+                start = date_type.fromisoformat(watermark) - timedelta(days=overlap_days)
+            else:
+                start = date_type.fromisoformat(end_date) - timedelta(days=initial_days)
+            start_date = min(start, date_type.fromisoformat(end_date)).isoformat()
+
+        url = self.base_url + f'DONKI/{type}'
+
+        def _fetch_window(window: Tuple[str, str]) -> list:
+            params = {'startDate': window[0], 'endDate': window[1], 'api_key': self.api_key}
+            response = self._get(url, params=params, priority=PRIORITY_LOW)
+            response.raise_for_status()
+            # DONKI answers with an empty body when there are no events
+            return loads(response.content) if response.content.strip() else []
+
+        windows = _date_chunks(start_date, end_date, chunk_days)
+
+        try:
+            events = [event for chunk in _map_concurrent(_fetch_window, windows, max_workers) for event in chunk]
+            written = self.donki_store.upsert(type, events)
+
+            watermark = self.donki_store.watermark(type)
+            if watermark is None or end_date > watermark:
+                self.donki_store.set_watermark(type, end_date)
+
+            return written
+        except Exception as e:
+            self.stats.record_error('donki')
+            raise _as_api_error('donki', e)
+
+    def query_donki_history(self, type: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """Returns DONKI events of one type from the local event store, without network I/O.
+
+        :param type: type of event (e.g. 'CME')
+        :param start_date: start date in the format 'YYYY-MM-DD' (optional)
+        :param end_date: end date in the format 'YYYY-MM-DD' (optional)
+        :returns: result as a DataFrame
+        """
+        if self.donki_store is None:
+            raise ValueError("query_donki_history requires a donki_store")
+        return self.donki_store.query(type, start_date, end_date)
+
+    def _exoplanet_request(self, table: str, where: str = None, select: str = None, order: str = None, **kwargs: Any) -> Tuple[str, dict]:
+        """Builds the URL and parameters of an Exoplanet Archive query."""
+        params = {
+            'select': select,
+            'order': order,
+            'api_key': self.api_key,
+            **kwargs
+        }
+
+        # Construct the query URL with table and other parameters
+        url = self.exoplanet_url + f'table={table}'
+        if where:
+            url += f'&where={where}'
+
+        return url, params
+
+    def _download_exoplanet_table(self, table: str) -> pd.DataFrame:
+        """Downloads every row and column of an Exoplanet Archive table."""
+        url, params = self._exoplanet_request(table, select='*')
+        # Not streamed, so the response cache and request coalescing cover the archive's large bodies
+        response = self._get(url, params=params)
+        response.raise_for_status()
+        return _read_exoplanet_csv(_response_stream(response))
 
-        return _query_donki(start_date, end_date, type, **kwargs)
-    def query_exoplanet_data(self, table: str, where: str = None, select: str = None, order: str = None, format: str = "csv", cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+    def query_exoplanet_data(self, table: str, where: str = None, select: str = None, order: str = None, format: str = "csv", cache_time: int = 3600, *, chunksize: int = EXOPLANET_CSV_CHUNKSIZE, arrow: bool = False, snapshot: bool = False, **kwargs: Any) -> pd.DataFrame:
         """Queries the NASA Exoplanet Archive API and returns a DataFrame containing exoplanet data.
 
         :param table: name of the data table to query (e.g., 'cumulative')
@@ -210,37 +1355,119 @@ class NASA_APIConnection(ExperimentalBaseConnection[requests.Session]):
         :param order: 'order' clause to specify the order of rows (optional)
         :param format: preferred output file format ('csv' or 'ipac') (default: 'csv')
         :param cache_time: time to cache the result
+        :param chunksize: number of CSV rows parsed at a time
+        :param arrow: return Arrow-backed columns instead of NumPy ones (requires pyarrow and pandas 1.5 or later)
+        :param snapshot: run the query against a local snapshot of the table (requires an exoplanet_snapshot and a select
+            clause, '*' for every column), falling back to the remote archive for clauses the local evaluator does not support
         :param kwargs: other optional parameters
         :returns: result as a DataFrame
+        :raises NASAAPIError: if the query fails (see api_errors)
+        :raises ValueError: if arrow is set but pandas has no Arrow-backed columns
         """
 
-        @cache_data(ttl=cache_time)
-        def _query_exoplanet_data(table: str, where: str, select: str, order: str, **kwargs: Any) -> pd.DataFrame:
-            base_url = "https://exoplanetarchive.ipac.caltech.edu/cgi-bin/nstedAPI/nph-nstedAPI?"
-            params = {
-                'select': select,
-                'order': order,
-                'api_key': self.api_key,
-                **kwargs
-            }
+        if arrow and not hasattr(pd, 'ArrowDtype'):
+            raise ValueError(f"arrow=True requires pandas 1.5 or later, found {pd.__version__}")
 
-            # Construct the query URL with table and other parameters
-            url = base_url + f'table={table}'
-            if where:
-                url += f'&where={where}'
+        # Without a select clause the archive returns its default columns, which the snapshot does not know
+        if snapshot and self.exoplanet_snapshot is not None and select and not kwargs:
+            try:
+                return self.exoplanet_snapshot.query(table, self._download_exoplanet_table, where=where, select=select, order=order)
+            except (TypeError, ValueError) as e:
+                # TypeError: e.g. an ordering comparison on a categorical column
+                logger.info("Running the query remotely, the local snapshot cannot evaluate it: %s", e)
+            except Exception as e:
+                self.stats.record_error('exoplanet')
+                raise _as_api_error('exoplanet', e)
+
+        @cache_data(ttl=cache_time)
+        def _query_exoplanet_data(table: str, where: str, select: str, order: str, chunksize: int, arrow: bool, **kwargs: Any) -> pd.DataFrame:
+            self.stats.record_cache_miss('exoplanet')
+            url, params = self._exoplanet_request(table, where, select, order, **kwargs)
 
             try:
-                response = self._instance.get(url, params=params)
+                # Not streamed, so the response cache and request coalescing cover the archive's large bodies
+                response = self._get(url, params=params)
                 response.raise_for_status()
-                data = response.text
 
                 # Handle different output formats (csv or ipac)
                 if format == "csv":
-                    result = pd.read_csv(StringIO(data))
+                    with self.stats.timer('exoplanet', 'decode'):
+                        result = _read_exoplanet_csv(_response_stream(response), chunksize=chunksize, arrow=arrow)
 
                 return result
             except Exception as e:
-                print(f"An error occurred: {e}")
-                return None
+                self.stats.record_error('exoplanet')
+                raise _as_api_error('exoplanet', e)
+
+        self.stats.record_call('exoplanet')
+        return self._call_cached(_query_exoplanet_data, cache_time, table, where, select, order, chunksize, arrow, **kwargs)
+
+
+class AsyncNASA_APIConnection(NASA_APIConnection):
+    """Asyncio st.experimental_connection implementation for NASA API
+
+    The query methods are awaitable and run on a bounded thread pool over the
+    same pooled session, so they share its connection pool and Retry configuration.
+    """
+
+    def __init__(self, connection_name: str,
+                 api_key: str,
+                 max_concurrency: int = 8,
+                 **kwargs):
+
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="nasa-api")
+
+        super().__init__(connection_name, api_key=api_key, **kwargs)
+
+    async def _run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Runs a blocking call on the connection's thread pool and awaits its result."""
+        loop = asyncio.get_running_loop()
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+        def _call():
+            if ctx is not None:
+                add_script_run_ctx(ctx=ctx)
+            return func(*args, **kwargs)
+
+        return await loop.run_in_executor(self._executor, _call)
+
+    async def query_apod(self, date: str, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_apod."""
+        return await self._run(super().query_apod, date, cache_time=cache_time, **kwargs)
+
+    async def query_neows(self, start_date: str, end_date: str, cache_time: int = 3600, *, long_format: bool = False, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_neows."""
+        return await self._run(super().query_neows, start_date, end_date, cache_time=cache_time, long_format=long_format, **kwargs)
+
+    async def query_mars_rover_photos(self, rover_name: str, sol: str, cache_time: int = 3600, *, limit: int = 100, max_workers: int = MARS_ROVER_MAX_PREFETCH, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_mars_rover_photos."""
+        return await self._run(super().query_mars_rover_photos, rover_name, sol, cache_time=cache_time, limit=limit, max_workers=max_workers, **kwargs)
+
+    async def query_donki(self, start_date: str = None, end_date: str = None, type: str = "all", cache_time: int = 3600, *, stream: bool = False, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_donki."""
+        return await self._run(super().query_donki, start_date, end_date, type=type, cache_time=cache_time, stream=stream, **kwargs)
+
+    async def query_donki_all(self, start_date: str = None, end_date: str = None, types: Iterable[str] = DONKI_ALL_TYPES, max_workers: int = 8, cache_time: int = 3600, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_donki_all."""
+        return await self._run(super().query_donki_all, start_date, end_date, types=types, max_workers=max_workers, cache_time=cache_time, **kwargs)
+
+    async def query_exoplanet_data(self, table: str, where: str = None, select: str = None, order: str = None, format: str = "csv", cache_time: int = 3600, *, chunksize: int = EXOPLANET_CSV_CHUNKSIZE, arrow: bool = False, snapshot: bool = False, **kwargs: Any) -> pd.DataFrame:
+        """Awaitable version of NASA_APIConnection.query_exoplanet_data."""
+        return await self._run(super().query_exoplanet_data, table, where=where, select=select, order=order, format=format, cache_time=cache_time, chunksize=chunksize, arrow=arrow, snapshot=snapshot, **kwargs)
+
+    async def gather(self, *queries: Any, concurrency: Optional[int] = None, return_exceptions: bool = False) -> List[Any]:
+        """Awaits many queries at once with at most `concurrency` of them in flight.
+
+        :param queries: awaitables returned by the query_* methods
+        :param concurrency: maximum number of queries in flight (default: max_concurrency)
+        :param return_exceptions: return exceptions as results instead of raising the first one
+        :returns: results in the order the queries were given
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+        async def _bounded(query):
+            async with semaphore:
+                return await query
 
-        return _query_exoplanet_data(table, where, select, order, **kwargs)
+        return await asyncio.gather(*(_bounded(query) for query in queries), return_exceptions=return_exceptions)